@@ -0,0 +1,76 @@
+import asyncio
+import enum
+from types import MappingProxyType
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import AccessRule, BusinessObject
+
+
+class Permission(enum.IntFlag):
+    CREATE = enum.auto()
+    READ = enum.auto()
+    READ_ALL = enum.auto()
+    UPDATE = enum.auto()
+    UPDATE_ALL = enum.auto()
+    DELETE = enum.auto()
+    DELETE_ALL = enum.auto()
+
+
+permission_columns = {
+    Permission.CREATE: AccessRule.create_permission,
+    Permission.READ: AccessRule.read_permission,
+    Permission.READ_ALL: AccessRule.read_all_permission,
+    Permission.UPDATE: AccessRule.update_permission,
+    Permission.UPDATE_ALL: AccessRule.update_all_permission,
+    Permission.DELETE: AccessRule.delete_permission,
+    Permission.DELETE_ALL: AccessRule.delete_all_permission,
+}
+
+
+class AccessMatrix:
+    """Immutable snapshot of access rules: (role_id, business object tag) -> permission bitmask."""
+
+    __slots__ = ("_masks", "_tags")
+
+    def __init__(self, masks: dict[tuple[int, str], int]):
+        self._masks = MappingProxyType(dict(masks))
+        self._tags = frozenset(tag for _, tag in self._masks)
+
+    def __len__(self) -> int:
+        return len(self._masks)
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self._tags
+
+    def mask(self, role_id: int, tag: str) -> int:
+        return self._masks.get((role_id, tag), 0)
+
+
+access_matrix_statement = (
+    select(AccessRule.role_id, BusinessObject.name, *permission_columns.values())
+    .join(BusinessObject, AccessRule.business_object_id == BusinessObject.id)
+)
+
+_access_matrix = AccessMatrix({})
+_reload_lock = asyncio.Lock()
+
+
+def get_access_matrix() -> AccessMatrix:
+    return _access_matrix
+
+
+async def reload_access_matrix(session: AsyncSession) -> AccessMatrix:
+    global _access_matrix
+    async with _reload_lock:
+        rows = (await session.execute(access_matrix_statement)).all()
+        masks = {}
+        for role_id, tag, *flags in rows:
+            mask = 0
+            for permission, granted in zip(permission_columns, flags):
+                if granted:
+                    mask |= permission
+            masks[(role_id, tag)] = int(mask)
+        _access_matrix = AccessMatrix(masks)
+    return _access_matrix
@@ -0,0 +1,26 @@
+"""access rules keyset index
+
+Revision ID: 5c1e9a7d3b20
+Revises: 27ae34c4b70b
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9a7d3b20'
+down_revision: Union[str, None] = '27ae34c4b70b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_access_rules_business_object_id_id', 'access_rules', ['business_object_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_access_rules_business_object_id_id', table_name='access_rules')
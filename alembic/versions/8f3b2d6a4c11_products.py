@@ -0,0 +1,38 @@
+"""products
+
+Revision ID: 8f3b2d6a4c11
+Revises: 5c1e9a7d3b20
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3b2d6a4c11'
+down_revision: Union[str, None] = '5c1e9a7d3b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.String(), nullable=False),
+    sa.Column('price', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_products_owner_id_id', 'products', ['owner_id', 'id'], unique=False)
+    op.create_index('ix_products_price_id', 'products', ['price', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_price_id', table_name='products')
+    op.drop_index('ix_products_owner_id_id', table_name='products')
+    op.drop_table('products')
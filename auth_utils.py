@@ -1,48 +1,44 @@
+import hashlib
 import re
+import time
 from datetime import datetime, timedelta, timezone
-import os
 
-import bcrypt
 import jwt
-from fastapi import Request, HTTPException, status, Depends
-from fastapi.security import HTTPBearer
+from fastapi import FastAPI, Request, HTTPException, status, Depends
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jwt import ExpiredSignatureError, InvalidTokenError
-from sqlalchemy import select, and_
+from sqlalchemy import select, bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
-from dotenv import load_dotenv
+from sqlalchemy.orm import joinedload
 
+from access_matrix import Permission, get_access_matrix
+from cache import TTLCache
 from db import get_session
-from models import User, Role, BusinessObject, AccessRule
-from redis_client import redis_client
+from metrics import timed_phase
+from models import User
+from principal import Principal, get_cached_principal
+from settings import get_settings
 
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-TOKEN_EXPIRE_SECONDS = int(os.getenv("TOKEN_EXPIRE_SECONDS"))
+settings = get_settings()
 
 
 http_bearer = HTTPBearer()
-
-
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+# digest of a token whose signature was already verified -> its payload, kept until the token's exp
+token_cache = TTLCache(settings.token_cache_size, settings.token_expire_seconds)
 
 
 def create_jwt_token(data: dict) -> str:
-    expire = datetime.now(timezone.utc) + timedelta(seconds=TOKEN_EXPIRE_SECONDS)
-    data.update({"exp": expire, "iat": datetime.now(timezone.utc)})
-    return jwt.encode(data, SECRET_KEY, algorithm=ALGORITHM)
+    """Short-lived access token; it is never revoked, so TOKEN_EXPIRE_SECONDS bounds how long it outlives logout."""
+    expire = datetime.now(timezone.utc) + timedelta(seconds=settings.token_expire_seconds)
+    data.update({"exp": expire, "iat": datetime.now(timezone.utc), "type": "access"})
+    return jwt.encode(data, settings.secret_key, algorithm=settings.algorithm)
 
 
-async def get_token(token: HTTPBearer = Depends(http_bearer)):
-    return token.credentials
-
-
-async def get_payload(token: str = Depends(get_token)) -> dict:
+def verify_token(token: str) -> dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except ExpiredSignatureError:
         raise HTTPException(
             detail="Token has expired",
@@ -59,91 +55,139 @@ async def get_payload(token: str = Depends(get_token)) -> dict:
             status_code=status.HTTP_401_UNAUTHORIZED
         )
 
+    if payload.get("type") != "access":
+        raise HTTPException(
+            detail="Invalid token",
+            status_code=status.HTTP_401_UNAUTHORIZED
+        )
     return payload
 
 
-async def check_token_in_redis_blacklist(token: str = Depends(get_token)):
-    if await redis_client.get(token):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+def warm_up():
+    """Sign and verify a throwaway token so the first request does not pay for loading the JWT machinery."""
+    verify_token(create_jwt_token({"id": 0}))
 
 
-async def get_current_user(
-    session: AsyncSession = Depends(get_session),
-    payload: dict = Depends(get_payload),
-    _=Depends(check_token_in_redis_blacklist)
-) -> User:
+def decode_token(token: str) -> dict:
+    with timed_phase("jwt"):
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        payload = token_cache.get(key)
+        if payload is None:
+            payload = verify_token(token)
+            if "exp" in payload:
+                token_cache.set(key, payload, payload["exp"] - time.time())
+    return payload
+
+
+async def resolve_principal(payload: dict) -> Principal:
     try:
         user_id: int = int(payload['id'])
-        user: User = (
-            await session.execute(select(User).where(User.id == user_id))
-        ).scalars().one_or_none()
-        return user
     except Exception:
         raise HTTPException(
             detail=f"No user from token",
             status_code=status.HTTP_401_UNAUTHORIZED
         )
 
-
-async def get_role(
-    user: User = Depends(get_current_user),
-) -> Role:
-    if user.role is None:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    return user.role
+    with timed_phase("principal"):
+        principal = await get_cached_principal(user_id)
+    if principal is None:
+        raise HTTPException(
+            detail=f"No user from token",
+            status_code=status.HTTP_401_UNAUTHORIZED
+        )
+    return principal
 
 
 method_permissions = {
-    "POST": ["create_permission", "create_permission"],
-    "GET": ["read_permission", "read_all_permission"],
-    "DELETE": ["delete_permission", "delete_all_permission"],
-    "PUT": ["update_permission", "update_all_permission"],
-    "PATCH": ["update_permission", "update_all_permission"],
+    "POST": (int(Permission.CREATE), int(Permission.CREATE)),
+    "GET": (int(Permission.READ), int(Permission.READ_ALL)),
+    "DELETE": (int(Permission.DELETE), int(Permission.DELETE_ALL)),
+    "PUT": (int(Permission.UPDATE), int(Permission.UPDATE_ALL)),
+    "PATCH": (int(Permission.UPDATE), int(Permission.UPDATE_ALL)),
 }
 
 
-async def check_access_rights(
+class RouteAuth:
+    __slots__ = ("tag", "own_permission", "all_permission", "own_scope")
+
+    def __init__(self, tag: str, own_permission: int, all_permission: int, own_scope: bool):
+        self.tag = tag
+        self.own_permission = own_permission
+        self.all_permission = all_permission
+        self.own_scope = own_scope
+
+
+route_table: dict[tuple[str, str], RouteAuth] = {}
+
+
+def get_route_auth(path: str, method: str) -> RouteAuth | None:
+    return route_table.get((path, method))
+
+
+async def authorize(
     request: Request,
-    role: Role = Depends(get_role),
-    session: AsyncSession = Depends(get_session),
-):
+    credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
+) -> Principal:
+    payload = decode_token(credentials.credentials)
+    principal = await resolve_principal(payload)
+    if not principal.is_active:
+        raise HTTPException(detail="Inactive user", status_code=status.HTTP_403_FORBIDDEN)
+
     route = request.scope.get('route')
-    tags = route.tags if route else []
-    if not tags:
+    route_auth = get_route_auth(route.path, request.method) if route else None
+    if route_auth is None or principal.role_id is None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
 
-    business_object = (
-        await session.execute(
-            select(BusinessObject).where(BusinessObject.name.in_(tags))
-        )
-    ).scalars().one_or_none()
-    if business_object is None:
+    mask = get_access_matrix().mask(principal.role_id, route_auth.tag)
+    if mask & route_auth.all_permission:
+        return principal
+    elif route_auth.own_scope and mask & route_auth.own_permission:
+        return principal
+    else:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
 
-    access_rule = (
-        await session.execute(
-            select(AccessRule).where(
-                and_(
-                    AccessRule.role_id == role.id,
-                    AccessRule.business_object_id == business_object.id)
-                )
-        )
-    ).scalars().one_or_none()
-    if access_rule is None:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
 
-    permissions = method_permissions.get(request.method)
-    if not permissions:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+current_user_statement = select(User).options(joinedload(User.role)).where(User.id == bindparam("user_id"))
 
-    all_permission = permissions[1] if len(permissions) > 1 else None
-    own_permission = permissions[0]
-    if all_permission and getattr(access_rule, all_permission, False):
-        return
-    elif "/my" in request.url.path and getattr(access_rule, own_permission, False):
-        return
-    else:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
+    principal: Principal = Depends(authorize),
+) -> User:
+    user: User = (
+        await session.execute(current_user_statement, {"user_id": principal.id})
+    ).scalars().one_or_none()
+    if user is None:
+        raise HTTPException(
+            detail=f"No user from token",
+            status_code=status.HTTP_401_UNAUTHORIZED
+        )
+    return user
+
+
+def _depends_on(dependant: Dependant, call) -> bool:
+    return any(
+        dependency.call is call or _depends_on(dependency, call)
+        for dependency in dependant.dependencies
+    )
+
+
+def build_route_table(app: FastAPI) -> dict[tuple[str, str], RouteAuth]:
+    global route_table
+    table = {}
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or not _depends_on(route.dependant, authorize):
+            continue
+        if not route.tags:
+            raise RuntimeError(f"Protected route {route.path} has no tag to map it to a business object")
+        for method in route.methods:
+            permissions = method_permissions.get(method)
+            if permissions is None:
+                raise RuntimeError(f"Protected route {method} {route.path} has no permission for its method")
+            own_permission, all_permission = permissions
+            table[(route.path, method)] = RouteAuth(route.tags[0], own_permission, all_permission, "/my" in route.path)
+    route_table = table
+    return table
 
 
 def password_validator(password):
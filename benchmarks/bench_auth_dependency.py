@@ -0,0 +1,94 @@
+"""Measure FastAPI dependency-injection overhead of the old per-route auth chain
+(get_token -> get_payload -> blacklist -> get_current_user -> get_role -> check_access_rights)
+against the single authorize dependency. Dependency bodies are no-ops so only DI cost is timed.
+
+    python -m benchmarks.bench_auth_dependency --requests 20000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI, Request
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+http_bearer = HTTPBearer()
+
+
+async def get_session():
+    yield None
+
+
+async def get_token(credentials: HTTPAuthorizationCredentials = Depends(http_bearer)):
+    return credentials.credentials
+
+
+async def get_payload(token: str = Depends(get_token)):
+    return {"id": 1}
+
+
+async def check_blacklist(token: str = Depends(get_token)):
+    return None
+
+
+async def get_current_user(session=Depends(get_session), payload=Depends(get_payload), _=Depends(check_blacklist)):
+    return payload
+
+
+async def get_role(user=Depends(get_current_user)):
+    return user
+
+
+async def check_access_rights(request: Request, role=Depends(get_role), session=Depends(get_session)):
+    return None
+
+
+async def authorize(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
+):
+    return {"id": 1}
+
+
+app = FastAPI()
+
+
+@app.get("/chain", tags=["bench"])
+async def chain(
+    session=Depends(get_session),
+    user=Depends(get_current_user),
+    role=Depends(get_role),
+    _=Depends(check_access_rights),
+):
+    return None
+
+
+@app.get("/single", tags=["bench"])
+async def single(session=Depends(get_session), principal=Depends(authorize)):
+    return None
+
+
+async def run(path: str, requests: int) -> float:
+    headers = {"Authorization": "Bearer token"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for _ in range(200):
+            await client.get(path, headers=headers)
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get(path, headers=headers)
+        return (time.perf_counter() - started) / requests * 1_000_000
+
+
+async def main(requests: int):
+    chain_us = await run("/chain", requests)
+    single_us = await run("/single", requests)
+    print(f"chain of dependencies: {chain_us:8.1f} us/request")
+    print(f"single authorize:      {single_us:8.1f} us/request")
+    print(f"saved:                 {chain_us - single_us:8.1f} us/request ({1 - single_us / chain_us:.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
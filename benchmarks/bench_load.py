@@ -0,0 +1,175 @@
+"""Load and latency benchmark for the auth hot path: sign-up, login, GET /access-rules/my, GET /products,
+token refresh and logout.
+
+By default main.app runs in-process on a throwaway SQLite database (aiosqlite) with fakeredis standing in for
+Redis, so nothing from docker-compose is needed. Pass --base-url to drive a running server instead; SQL query
+counts are only available in-process.
+
+    python -m benchmarks.bench_load --requests 500 --concurrency 20
+    python -m benchmarks.bench_load --base-url http://localhost:8000
+"""
+import argparse
+import asyncio
+import itertools
+import math
+import os
+import tempfile
+import time
+import uuid
+from contextlib import AsyncExitStack
+
+import httpx
+
+PASSWORD = "aBc123-+"
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def before_cursor_execute(self, *args):
+        self.count += 1
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(math.ceil(q * len(sorted_values)) - 1, 0)]
+
+
+async def run_scenario(name, make_request, requests: int, concurrency: int, counter: QueryCounter | None):
+    latencies = []
+    errors = 0
+    indexes = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in indexes:
+            started = time.perf_counter()
+            try:
+                response = await make_request(i)
+            except httpx.TransportError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    queries_before = counter.count if counter else 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    queries = f"{(counter.count - queries_before) / requests:9.2f}" if counter else f"{'-':>9}"
+    print(
+        f"{name:22} {requests:7} {errors:6} "
+        f"{percentile(latencies, 0.50) * 1000:8.2f} {percentile(latencies, 0.95) * 1000:8.2f} "
+        f"{percentile(latencies, 0.99) * 1000:8.2f} {requests / elapsed:9.1f} {queries}"
+    )
+
+
+async def setup_in_process(stack: AsyncExitStack, bcrypt_rounds: int):
+    directory = stack.enter_context(tempfile.TemporaryDirectory())
+    for key, value in {
+        "DATABASE_URL": f"sqlite+aiosqlite:///{directory}/bench.db",
+        "POSTGRES_HOST": "localhost", "POSTGRES_PORT": "5432",
+        "REDIS_HOST": "localhost", "REDIS_PORT": "6379", "REDIS_DB": "0",
+        "SECRET_KEY": uuid.uuid4().hex * 2, "ALGORITHM": "HS256", "TOKEN_EXPIRE_SECONDS": "3600",
+        "BCRYPT_ROUNDS": str(bcrypt_rounds),
+        # every simulated user comes from the same address
+        "RATE_LIMIT_LOGIN_IP": "0", "RATE_LIMIT_SIGN_UP_IP": "0",
+    }.items():
+        os.environ[key] = value
+
+    import fakeredis
+    from sqlalchemy import Engine, event
+
+    import db
+    from main import app
+    from models import Base
+    from redis_client import redis_client
+    from static.fill_db_data import fill_db_data
+
+    redis_client.redis = fakeredis.FakeAsyncRedis()
+    stack.push_async_callback(db.engine.dispose)
+    async with db.engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with db.AsyncSessionLocal() as session:
+        await fill_db_data(session)
+        await session.commit()
+    await stack.enter_async_context(app.router.lifespan_context(app))
+
+    counter = QueryCounter()
+    event.listen(Engine, "before_cursor_execute", counter.before_cursor_execute)
+    return httpx.ASGITransport(app=app), counter
+
+
+async def main(args):
+    async with AsyncExitStack() as stack:
+        if args.base_url:
+            transport, counter, base_url = None, None, args.base_url
+        else:
+            transport, counter = await setup_in_process(stack, args.bcrypt_rounds)
+            base_url = "http://bench"
+        client = await stack.enter_async_context(
+            httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60)
+        )
+
+        roles = (await client.get("/roles")).json()
+        # Superusers may read all products, so every scenario below is an authorized request
+        role_id = next(role["id"] for role in roles if role["name"] == "Superuser")
+        run_id = uuid.uuid4().hex[:8]
+        emails = [f"bench-{run_id}-{i}@example.com" for i in range(args.requests)]
+        signup_tokens, signup_refresh_tokens = [None] * args.requests, [None] * args.requests
+        login_refresh_tokens = [None] * args.requests
+
+        async def sign_up(i):
+            response = await client.post("/auth/sign-up", json={
+                "firstname": "Bench", "surname": "User", "email": emails[i], "password": PASSWORD, "role_id": role_id,
+            })
+            signup_tokens[i] = response.json().get("token")
+            signup_refresh_tokens[i] = response.json().get("refresh_token")
+            return response
+
+        async def login(i):
+            response = await client.post("/auth/login", json={"email": emails[i], "password": PASSWORD})
+            login_refresh_tokens[i] = response.json().get("refresh_token")
+            return response
+
+        def bearer(token):
+            return {"Authorization": f"Bearer {token}"}
+
+        tokens = itertools.cycle(range(args.requests))
+
+        async def my_access_rules(i):
+            return await client.get("/access-rules/my", headers=bearer(signup_tokens[next(tokens)]))
+
+        async def products(i):
+            return await client.get("/products", headers=bearer(signup_tokens[next(tokens)]))
+
+        async def refresh(i):
+            return await client.post("/auth/refresh", json={"refresh_token": signup_refresh_tokens[i]})
+
+        async def logout(i):
+            return await client.post("/auth/logout", json={"refresh_token": login_refresh_tokens[i]})
+
+        print(f"{'scenario':22} {'requests':>7} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'req/s':>9} {'SQL/req':>9}")
+        for name, make_request in (
+            ("POST /auth/sign-up", sign_up),
+            ("POST /auth/login", login),
+            ("GET /access-rules/my", my_access_rules),
+            ("GET /products", products),
+            ("POST /auth/refresh", refresh),
+            ("POST /auth/logout", logout),
+        ):
+            await run_scenario(name, make_request, args.requests, args.concurrency, counter)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--base-url", help="benchmark a running server instead of an in-process app")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="in-process only")
+    asyncio.run(main(parser.parse_args()))
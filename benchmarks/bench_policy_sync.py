@@ -0,0 +1,75 @@
+"""Time static.sync_policy against a throwaway SQLite database for a generated policy of about --rules access
+rules: the initial sync, an idempotent re-sync and a re-sync with --changed rules modified.
+
+    python -m benchmarks.bench_policy_sync --rules 10000 --changed 1000
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import uuid
+
+
+def make_policy(rules: int, roles: list[str], seed: int) -> dict:
+    rng = random.Random(seed)
+    permissions = ["create", "read", "read_all", "update", "update_all", "delete", "delete_all"]
+    business_objects = [f"object_{i}" for i in range(-(-rules // len(roles)))]
+    return {
+        "roles": roles,
+        "business_objects": business_objects,
+        "access_rules": {
+            role: {name: [p for p in permissions if rng.random() < 0.5] for name in business_objects}
+            for role in roles
+        },
+    }
+
+
+async def timed_sync(label: str, policy, session_factory, sync_policy):
+    started = time.perf_counter()
+    async with session_factory() as session:
+        changes = await sync_policy(session, policy)
+        await session.commit()
+    print(f"{label:24} {(time.perf_counter() - started) * 1000:9.1f} ms  {changes}")
+
+
+async def main(rules: int, changed: int):
+    with tempfile.TemporaryDirectory() as directory:
+        for key, value in {
+            "DATABASE_URL": f"sqlite+aiosqlite:///{directory}/bench.db",
+            "POSTGRES_HOST": "localhost", "POSTGRES_PORT": "5432",
+            "REDIS_HOST": "localhost", "REDIS_PORT": "6379", "REDIS_DB": "0",
+            "SECRET_KEY": uuid.uuid4().hex * 2, "ALGORITHM": "HS256", "TOKEN_EXPIRE_SECONDS": "3600",
+        }.items():
+            os.environ[key] = value
+
+        import db
+        from models import Base, RoleType
+        from static.sync_policy import Policy, sync_policy
+
+        async with db.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+        roles = [role.value for role in RoleType]
+        raw_policy = make_policy(rules, roles, seed=1)
+        policy = Policy.model_validate(raw_policy)
+        await timed_sync("initial sync", policy, db.AsyncSessionLocal, sync_policy)
+        await timed_sync("unchanged re-sync", policy, db.AsyncSessionLocal, sync_policy)
+
+        rng = random.Random(2)
+        objects = raw_policy["business_objects"]
+        for role, name in {(rng.choice(roles), rng.choice(objects)) for _ in range(changed)}:
+            grants = raw_policy["access_rules"][role][name]
+            raw_policy["access_rules"][role][name] = [] if grants else ["read"]
+        await timed_sync(f"re-sync, ~{changed} changed", Policy.model_validate(raw_policy), db.AsyncSessionLocal,
+                         sync_policy)
+        await db.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=10_000)
+    parser.add_argument("--changed", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rules, args.changed))
@@ -0,0 +1,66 @@
+"""Compare the per-request cost of the legacy User load with the lean principal projection
+as one role grows. Runs against the configured Postgres inside a transaction that is rolled back.
+
+    python -m benchmarks.bench_principal_loading --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import selectinload
+
+from db import AsyncSessionLocal
+from models import User, Role
+from principal import load_principal
+
+
+async def timed(coro_factory, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await coro_factory()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+async def main(sizes: list[int], repeat: int):
+    async with AsyncSessionLocal() as session:
+        role = (await session.execute(select(Role).limit(1))).scalars().one()
+        probe_id = None
+        inserted = 0
+        print(f"{'users in role':>14} {'legacy, ms':>12} {'principal, ms':>14}")
+        for size in sorted(sizes):
+            await session.execute(
+                text(
+                    "INSERT INTO users (firstname, surname, email, hashed_password, is_active, role_id) "
+                    "SELECT 'bench', 'bench', 'bench-' || n || '@example.com', 'x', true, :role_id "
+                    "FROM generate_series(:start, :stop) AS n"
+                ),
+                {"role_id": role.id, "start": inserted + 1, "stop": size},
+            )
+            inserted = size
+            if probe_id is None:
+                probe_id = (
+                    await session.execute(select(User.id).where(User.email == "bench-1@example.com"))
+                ).scalar_one()
+
+            async def legacy():
+                session.expunge_all()
+                await session.execute(
+                    select(User)
+                    .options(selectinload(User.role).selectinload(Role.users))
+                    .where(User.id == probe_id)
+                )
+
+            async def lean():
+                await load_principal(session, probe_id)
+
+            print(f"{size:>14} {await timed(legacy, repeat):>12.2f} {await timed(lean, repeat):>14.2f}")
+        await session.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat))
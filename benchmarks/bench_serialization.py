@@ -0,0 +1,80 @@
+"""Compare FastAPI's response_model path (validate, dump to dicts, json.dumps) with the precompiled
+TypeAdapter path (validate once, dump_json) for a list of access rules loaded as ORM-like objects.
+
+    python -m benchmarks.bench_serialization --rules 10000 --rounds 20
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from models import RoleType
+from schemas.access_rules_schemas import AccessRuleResponse, access_rule_list_adapter
+from serialization import fast_json_response
+
+
+def make_rules(count: int) -> list[SimpleNamespace]:
+    roles = [SimpleNamespace(id=i, name=role_type) for i, role_type in enumerate(RoleType, start=1)]
+    business_objects = [SimpleNamespace(id=i, name=f"object{i}") for i in range(1, 6)]
+    return [
+        SimpleNamespace(
+            id=i,
+            create_permission=True,
+            read_permission=True,
+            read_all_permission=i % 2 == 0,
+            update_permission=True,
+            update_all_permission=i % 3 == 0,
+            delete_permission=False,
+            delete_all_permission=False,
+            role=roles[i % len(roles)],
+            business_object=business_objects[i % len(business_objects)],
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def make_app(rules: list[SimpleNamespace]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/default", response_model=list[AccessRuleResponse], response_class=JSONResponse)
+    async def default():
+        return rules
+
+    @app.get("/orjson", response_model=list[AccessRuleResponse], response_class=ORJSONResponse)
+    async def orjson():
+        return rules
+
+    @app.get("/adapter", response_model=list[AccessRuleResponse])
+    async def adapter(response: Response):
+        return fast_json_response(access_rule_list_adapter, rules, response)
+
+    return app
+
+
+async def run(app: FastAPI, path: str, rounds: int) -> tuple[float, int]:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        body = (await client.get(path)).content
+        started = time.perf_counter()
+        for _ in range(rounds):
+            await client.get(path)
+        return (time.perf_counter() - started) / rounds * 1000, len(body)
+
+
+async def main(rules: int, rounds: int):
+    app = make_app(make_rules(rules))
+    results = {path: await run(app, path, rounds) for path in ("/default", "/orjson", "/adapter")}
+    baseline = results["/default"][0]
+    for path, (ms, size) in results.items():
+        print(f"{path:10} {ms:8.2f} ms/response  {size} bytes  x{baseline / ms:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rules, args.rounds))
@@ -0,0 +1,134 @@
+"""Import time of main, time until a fresh gunicorn reports /health/ready, and latency of its first requests.
+
+gunicorn is started on a throwaway SQLite database with a fakeredis TCP server like in benchmarks.bench_workers.
+The first request after readiness is compared with the following ones, so anything left unwarmed by the lifespan
+shows up as a gap between them. Every measurement has a budget; the script exits with 1 if one is exceeded.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 5 --import-budget 2 --ready-budget 5 --first-request-budget 0.05
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import jwt
+from fakeredis import TcpFakeServer
+
+from benchmarks.bench_workers import free_port, load_scripts, prepare_database
+
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def measure_import(env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def access_token(env: dict, user_id: int) -> str:
+    now = datetime.now(timezone.utc)
+    payload = {"id": user_id, "exp": now + timedelta(minutes=5), "iat": now, "type": "access"}
+    return jwt.encode(payload, env["SECRET_KEY"], algorithm=env["ALGORITHM"])
+
+
+async def measure_start(env: dict, path: str, headers: dict, requests: int, verbose: bool) -> tuple[float, list[float]]:
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "main:app", "-c", "gunicorn.conf.py"],
+        env={**env, "WEB_CONCURRENCY": "1", "BIND": f"127.0.0.1:{port}"},
+        stderr=None if verbose else subprocess.DEVNULL,
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"gunicorn exited with {process.returncode}")
+                try:
+                    if (await client.get("/health/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() - started > 60:
+                    raise RuntimeError("gunicorn did not become ready in time")
+                await asyncio.sleep(0.01)
+            ready = time.perf_counter() - started
+
+            latencies = []
+            for _ in range(requests):
+                request_started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies.append(time.perf_counter() - request_started)
+                response.raise_for_status()
+        return ready, latencies
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def check(name: str, value: float, budget: float) -> bool:
+    ok = value <= budget
+    print(f"{name:<28}{value * 1000:>10.1f} ms   budget {budget * 1000:>8.1f} ms   {'ok' if ok else 'EXCEEDED'}")
+    return ok
+
+
+async def main(args) -> bool:
+    with tempfile.TemporaryDirectory() as directory:
+        redis_server = TcpFakeServer(("127.0.0.1", free_port()))
+        threading.Thread(target=redis_server.serve_forever, daemon=True).start()
+        env = {
+            "DATABASE_URL": f"sqlite+aiosqlite:///{directory}/bench.db",
+            "POSTGRES_HOST": "localhost", "POSTGRES_PORT": "5432",
+            "REDIS_HOST": "127.0.0.1", "REDIS_PORT": str(redis_server.server_address[1]), "REDIS_DB": "0",
+            "SECRET_KEY": uuid.uuid4().hex * 2, "ALGORITHM": "HS256", "TOKEN_EXPIRE_SECONDS": "300",
+            "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+        }
+        os.environ.update(env)
+        await prepare_database()
+        load_scripts(redis_server.server_address[1])
+        env = {**os.environ, **env}
+        headers = {"Authorization": f"Bearer {access_token(env, args.user_id)}"}
+
+        try:
+            imports, readiness, first, warm = [], [], [], []
+            for _ in range(args.runs):
+                imports.append(measure_import(env))
+                ready, latencies = await measure_start(env, args.path, headers, args.requests, args.verbose)
+                readiness.append(ready)
+                first.append(latencies[0])
+                warm.extend(latencies[1:])
+        finally:
+            redis_server.shutdown()
+            redis_server.server_close()
+
+    print(f"{args.runs} run(s), {os.cpu_count()} CPU(s), GET {args.path}, medians")
+    return all([
+        check("import main", statistics.median(imports), args.import_budget),
+        check("spawn -> /health/ready", statistics.median(readiness), args.ready_budget),
+        check("first request", statistics.median(first), args.first_request_budget),
+        check("following requests", statistics.median(warm), args.first_request_budget),
+    ])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=20, help="requests after readiness per run, the first included")
+    parser.add_argument("--path", default="/access-rules/my")
+    parser.add_argument("--user-id", type=int, default=1, help="user the access token is minted for")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--import-budget", type=float, default=2.0, help="seconds")
+    parser.add_argument("--ready-budget", type=float, default=4.0, help="seconds")
+    parser.add_argument("--first-request-budget", type=float, default=0.05, help="seconds")
+    parser.add_argument("--verbose", action="store_true", help="show gunicorn logs")
+    sys.exit(0 if asyncio.run(main(parser.parse_args())) else 1)
@@ -0,0 +1,125 @@
+"""Throughput of the production server (gunicorn.conf.py) for different numbers of workers.
+
+For every worker count gunicorn is started on a throwaway SQLite database with a fakeredis TCP server shared by
+all workers, and benchmarks.bench_load drives it over HTTP. --hup sends SIGHUP to the master that many seconds
+into every run, so the errors column shows whether a graceful restart under load drops requests.
+
+    python -m benchmarks.bench_workers --workers 1,2,4 --requests 1000 --concurrency 50
+    python -m benchmarks.bench_workers --workers 2 --hup 2
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import httpx
+from fakeredis import TcpFakeServer
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def prepare_database():
+    import db
+    from models import Base
+    from static.fill_db_data import fill_db_data
+
+    async with db.engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with db.AsyncSessionLocal() as session:
+        await fill_db_data(session)
+        await session.commit()
+    await db.engine.dispose()
+
+
+def load_scripts(port: int):
+    # the fakeredis TCP server can drop the connection on SCRIPT LOAD sent by the async client under load,
+    # so the Lua scripts are loaded up front and the workers only ever need EVALSHA
+    from redis import Redis
+    from rate_limit import SLIDING_WINDOW_SCRIPT
+    from refresh_tokens import ROTATE_SCRIPT
+
+    with Redis(port=port) as client:
+        for script in (SLIDING_WINDOW_SCRIPT, ROTATE_SCRIPT):
+            client.script_load(script)
+
+
+async def wait_until_serving(base_url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {process.returncode}")
+            try:
+                if (await client.get("/roles")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("gunicorn did not start in time")
+
+
+async def main(args):
+    from benchmarks import bench_load
+
+    with tempfile.TemporaryDirectory() as directory:
+        redis_server = TcpFakeServer(("127.0.0.1", free_port()))
+        threading.Thread(target=redis_server.serve_forever, daemon=True).start()
+        env = {
+            "DATABASE_URL": f"sqlite+aiosqlite:///{directory}/bench.db",
+            "POSTGRES_HOST": "localhost", "POSTGRES_PORT": "5432",
+            "REDIS_HOST": "127.0.0.1", "REDIS_PORT": str(redis_server.server_address[1]), "REDIS_DB": "0",
+            "SECRET_KEY": uuid.uuid4().hex * 2, "ALGORITHM": "HS256", "TOKEN_EXPIRE_SECONDS": "300",
+            "BCRYPT_ROUNDS": str(args.bcrypt_rounds),
+            "RATE_LIMIT_LOGIN_IP": "0", "RATE_LIMIT_SIGN_UP_IP": "0",
+        }
+        os.environ.update(env)
+        await prepare_database()
+        load_scripts(redis_server.server_address[1])
+
+        try:
+            for workers in args.workers:
+                port = free_port()
+                process = subprocess.Popen(
+                    [sys.executable, "-m", "gunicorn", "main:app", "-c", "gunicorn.conf.py"],
+                    env={**os.environ, **env, "WEB_CONCURRENCY": str(workers), "BIND": f"127.0.0.1:{port}"},
+                    stderr=subprocess.DEVNULL if not args.verbose else None,
+                )
+                try:
+                    base_url = f"http://127.0.0.1:{port}"
+                    await wait_until_serving(base_url, process)
+                    print(f"\n{workers} worker(s), {os.cpu_count()} CPU(s)")
+                    if args.hup:
+                        asyncio.get_running_loop().call_later(args.hup, process.send_signal, signal.SIGHUP)
+                    await bench_load.main(argparse.Namespace(
+                        base_url=base_url, requests=args.requests, concurrency=args.concurrency,
+                        bcrypt_rounds=args.bcrypt_rounds,
+                    ))
+                finally:
+                    process.terminate()
+                    process.wait()
+        finally:
+            redis_server.shutdown()
+            redis_server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=lambda value: [int(count) for count in value.split(",")],
+                        default=[1, os.cpu_count() or 1], help="comma separated worker counts")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--hup", type=float, help="send SIGHUP to gunicorn this many seconds into each run")
+    parser.add_argument("--verbose", action="store_true", help="show gunicorn logs")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,69 @@
+import asyncio
+from types import MappingProxyType
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import BusinessObject, Role, RoleType
+
+
+class RoleCatalogue:
+    """Immutable snapshot of the roles table: role id -> role type."""
+
+    __slots__ = ("_roles",)
+
+    def __init__(self, roles: dict[int, RoleType]):
+        self._roles = MappingProxyType(dict(roles))
+
+    def __len__(self) -> int:
+        return len(self._roles)
+
+    def get(self, role_id: int) -> RoleType | None:
+        return self._roles.get(role_id)
+
+
+class BusinessObjectCatalogue:
+    """Immutable snapshot of the business_objects table: business object id -> name."""
+
+    __slots__ = ("_business_objects",)
+
+    def __init__(self, business_objects: dict[int, str]):
+        self._business_objects = MappingProxyType(dict(business_objects))
+
+    def __len__(self) -> int:
+        return len(self._business_objects)
+
+    def get(self, business_object_id: int) -> str | None:
+        return self._business_objects.get(business_object_id)
+
+
+role_catalogue_statement = select(Role.id, Role.name)
+business_object_catalogue_statement = select(BusinessObject.id, BusinessObject.name)
+
+_role_catalogue = RoleCatalogue({})
+_business_object_catalogue = BusinessObjectCatalogue({})
+_reload_lock = asyncio.Lock()
+
+
+def get_role_catalogue() -> RoleCatalogue:
+    return _role_catalogue
+
+
+async def reload_role_catalogue(session: AsyncSession) -> RoleCatalogue:
+    global _role_catalogue
+    async with _reload_lock:
+        rows = (await session.execute(role_catalogue_statement)).all()
+        _role_catalogue = RoleCatalogue({role_id: name for role_id, name in rows})
+    return _role_catalogue
+
+
+def get_business_object_catalogue() -> BusinessObjectCatalogue:
+    return _business_object_catalogue
+
+
+async def reload_business_object_catalogue(session: AsyncSession) -> BusinessObjectCatalogue:
+    global _business_object_catalogue
+    async with _reload_lock:
+        rows = (await session.execute(business_object_catalogue_statement)).all()
+        _business_object_catalogue = BusinessObjectCatalogue(dict(rows))
+    return _business_object_catalogue
@@ -1,22 +1,125 @@
-from dotenv import load_dotenv
+from sqlalchemy import Engine, event, text
+from sqlalchemy.engine.interfaces import CacheStats
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-import os
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
 
-load_dotenv()
+from metrics import Histogram, record_phase
+from settings import get_settings
 
-POSTGRES_HOST = os.getenv("POSTGRES_HOST")
-POSTGRES_PORT = os.getenv("POSTGRES_PORT")
-POSTGRES_DB = os.getenv("POSTGRES_DB")
-POSTGRES_USER = os.getenv("POSTGRES_USER")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
+logger = logging.getLogger(__name__)
 
-POSTGRES_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+settings = get_settings()
 
-engine = create_async_engine(POSTGRES_DATABASE_URL)
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_seconds = Histogram()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_seconds.observe(time.perf_counter() - started)
+
+
+def make_engine(url: str):
+    connect_args = {}
+    if url.startswith("postgresql+asyncpg"):
+        # server-side prepared statements kept per connection by SQLAlchemy's asyncpg adapter
+        connect_args = {
+            "prepared_statement_cache_size": settings.postgres_statement_cache_size,
+            "timeout": settings.postgres_connect_timeout,
+        }
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.postgres_pool_size,
+        max_overflow=settings.postgres_max_overflow,
+        pool_recycle=settings.postgres_pool_recycle,
+        pool_pre_ping=settings.postgres_pool_pre_ping,
+        pool_timeout=settings.postgres_pool_timeout,
+        query_cache_size=settings.postgres_query_cache_size,
+        connect_args=connect_args,
+    )
+
+
+engine = make_engine(settings.primary_database_url)
+replica_engines = [
+    make_engine(settings.make_database_url(*host.split(":", 1) if ":" in host else (host, 5432)))
+    for host in settings.postgres_replica_hosts
+]
 
 AsyncSessionLocal = async_sessionmaker(bind=engine, autoflush=False, autocommit=False)
+ReplicaSessionLocals = [
+    async_sessionmaker(bind=replica_engine, autoflush=False, autocommit=False)
+    for replica_engine in replica_engines
+]
+
+_replica_counter = itertools.count()
+_replica_down_until = [0.0] * len(ReplicaSessionLocals)
+
+
+class StatementCacheStats:
+    def __init__(self):
+        self.compiled = {"hit": 0, "miss": 0, "uncached": 0}
+        self.prepared = {"hit": 0, "miss": 0}
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            cache_hit = context.cache_hit
+            if cache_hit is CacheStats.CACHE_HIT:
+                self.compiled["hit"] += 1
+            elif cache_hit is CacheStats.CACHE_MISS:
+                self.compiled["miss"] += 1
+            else:
+                self.compiled["uncached"] += 1
+
+        prepared_cache = getattr(conn.connection.dbapi_connection, "_prepared_statement_cache", None)
+        if prepared_cache is not None:
+            self.prepared["hit" if statement in prepared_cache else "miss"] += 1
+
+    def stats(self) -> dict:
+        def with_rate(counters: dict) -> dict:
+            lookups = counters["hit"] + counters["miss"]
+            return {**counters, "hit_rate": counters["hit"] / lookups if lookups else 0.0}
+
+        return {"compiled": with_rate(self.compiled), "prepared": with_rate(self.prepared)}
+
+
+def pool_stats(engine_pool) -> dict:
+    return {
+        "size": engine_pool.size(),
+        "checked_out": engine_pool.checkedout(),
+        "idle": engine_pool.checkedin(),
+        "overflow": max(engine_pool.overflow(), 0),
+        "wait_seconds": engine_pool.wait_seconds.snapshot(),
+    }
+
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    record_phase("db", time.perf_counter() - conn.info["query_started"].pop())
+
+
+statement_cache_stats = StatementCacheStats()
+event.listen(Engine, "before_cursor_execute", statement_cache_stats.before_cursor_execute)
+event.listen(Engine, "before_cursor_execute", _start_query_timer)
+event.listen(Engine, "after_cursor_execute", _stop_query_timer)
 
 
 async def get_session():
@@ -25,3 +128,72 @@ async def get_session():
             yield session
         finally:
             await session.close()
+
+
+async def _open_read_session() -> AsyncSession:
+    replica_count = len(ReplicaSessionLocals)
+    if replica_count:
+        start = next(_replica_counter)
+        for offset in range(replica_count):
+            index = (start + offset) % replica_count
+            if _replica_down_until[index] > time.monotonic():
+                continue
+            session = ReplicaSessionLocals[index]()
+            try:
+                await session.connection()
+                return session
+            except (OSError, asyncio.TimeoutError, SQLAlchemyError):
+                await session.close()
+                _replica_down_until[index] = time.monotonic() + settings.postgres_replica_retry_seconds
+                logger.warning(
+                    "Read replica %s is unavailable", settings.postgres_replica_hosts[index], exc_info=True
+                )
+    return AsyncSessionLocal()
+
+
+@asynccontextmanager
+async def read_session():
+    """Session for pure reads: a healthy replica in round-robin order, or the primary."""
+    session = await _open_read_session()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_read_session():
+    async with read_session() as session:
+        yield session
+
+
+async def open_pool(pool_engine: AsyncEngine):
+    """Fill the pool up to its size at once, so that requests never pay for connecting."""
+    connections = await asyncio.gather(
+        *(pool_engine.connect().start() for _ in range(pool_engine.pool.size())), return_exceptions=True
+    )
+    for connection in connections:
+        if not isinstance(connection, BaseException):
+            await connection.close()
+    for connection in connections:
+        if isinstance(connection, BaseException):
+            raise connection
+
+
+async def open_pools():
+    await open_pool(engine)
+    for host, replica_engine in zip(settings.postgres_replica_hosts, replica_engines):
+        try:
+            await open_pool(replica_engine)
+        except (OSError, asyncio.TimeoutError, SQLAlchemyError):
+            # reads fall back to the primary until the replica comes back
+            logger.warning("Read replica %s is unavailable", host, exc_info=True)
+
+
+async def close_pools():
+    for pool_engine in (engine, *replica_engines):
+        await pool_engine.dispose()
+
+
+async def ping_database():
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
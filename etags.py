@@ -0,0 +1,88 @@
+import hashlib
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from access_matrix import permission_columns
+from auth_utils import authorize
+from models import AccessRule, BusinessObject, Role
+from principal import Principal
+
+access_rules_version_statement = select(
+    AccessRule.id, AccessRule.role_id, AccessRule.business_object_id, *permission_columns.values()
+).order_by(AccessRule.id)
+roles_version_statement = select(Role.id, Role.name).order_by(Role.id)
+business_objects_version_statement = select(BusinessObject.id, BusinessObject.name).order_by(BusinessObject.id)
+
+_versions: dict[str, bytes] = {}
+
+
+def _digest(*row_groups) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    for rows in row_groups:
+        for row in rows:
+            digest.update(repr(tuple(row)).encode())
+        digest.update(b"\0")
+    return digest.hexdigest().encode()
+
+
+async def reload_versions(session: AsyncSession):
+    """Derive the version of every family from the rows its responses are built from.
+
+    Every worker computes the same version from the same rows, so no shared counter is needed and
+    a conditional GET is answered without any I/O.
+    """
+    global _versions
+    access_rules = (await session.execute(access_rules_version_statement)).all()
+    roles = (await session.execute(roles_version_statement)).all()
+    business_objects = (await session.execute(business_objects_version_statement)).all()
+    _versions = {
+        "access_rules": _digest(access_rules, roles, business_objects),
+        "roles": _digest(roles),
+    }
+
+
+def get_version(family: str) -> bytes | None:
+    return _versions.get(family)
+
+
+def _check(request: Request, response: Response, family: str, scope: str):
+    version = get_version(family)
+    if version is None:
+        return
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (family.encode(), version, request.url.path.encode(), request.url.query.encode(), scope.encode()):
+        digest.update(part)
+        digest.update(b"\0")
+    etag = f'"{digest.hexdigest()}"'
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+
+def conditional_get(family: str, per_role: bool = False):
+    """Dependency answering If-None-Match with 304 from the family's version, before any query runs.
+
+    The version comes from the primary, so endpoints using it must read from the primary too: a lagging
+    replica would let clients cache an old body under the new ETag.
+    """
+
+    if per_role:
+        async def check_role_version(
+            request: Request,
+            response: Response,
+            principal: Principal = Depends(authorize),
+        ):
+            _check(request, response, family, f"role:{principal.role_id}")
+
+        return check_role_version
+
+    async def check_version(request: Request, response: Response):
+        _check(request, response, family, "")
+
+    return check_version
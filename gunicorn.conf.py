@@ -0,0 +1,30 @@
+"""Production server: gunicorn supervising uvicorn workers.
+
+    gunicorn main:app -c gunicorn.conf.py
+
+Every worker runs the lifespan startup (route table, access matrix, role catalogue) before it takes
+connections from the shared socket. kill -HUP <master pid> restarts the workers gracefully with the new
+code: new workers are spawned and the old ones finish their requests within graceful_timeout, while
+connections arriving meanwhile wait in the listen backlog.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY") or os.cpu_count() or 1)
+worker_class = "worker.AppWorker"
+# the app is imported by every worker rather than the master, so HUP picks up new code
+preload_app = False
+timeout = int(os.getenv("WORKER_TIMEOUT", 60))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("KEEPALIVE", 5))
+backlog = int(os.getenv("BACKLOG", 2048))
+max_requests = int(os.getenv("MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", 0))
+accesslog = os.getenv("ACCESS_LOG")
+
+# every worker has its own bcrypt thread pool; by default share the cores between workers
+os.environ.setdefault("HASHING_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
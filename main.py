@@ -1,10 +1,61 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+import auth_utils
+import password_hashing
+from db import close_pools, open_pools
+from policy_listener import policy_listener, reload_policy
+from redis_client import redis_client
+from request_metrics import RequestMetricsMiddleware
 from routers import *
+from settings import get_settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    app.state.settings = settings
+    app.state.ready = False
+    auth_utils.build_route_table(app)
+    # a worker starts accepting connections only once startup is over, so it never serves an empty matrix
+    # or makes its first requests wait for connections, bcrypt threads and the JWT code path
+    await open_pools()
+    await redis_client.open_pool(settings.redis_warm_connections)
+    # subscribe before the initial load, so that a change committed by another worker in between is not lost
+    await policy_listener.start()
+    await reload_policy()
+    await password_hashing.warm_up()
+    auth_utils.warm_up()
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    await policy_listener.stop()
+    await close_pools()
+    await redis_client.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    return JSONResponse(
+        content={"detail": "Database is busy, try again later"},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
+
 
-app = FastAPI()
+app.add_middleware(RequestMetricsMiddleware)
 
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(access_rules_router, prefix="/access-rules", tags=["access_rules"])
 app.include_router(profiles_router, prefix="/profile", tags=["profiles"])
 app.include_router(products_router, prefix="/products", tags=["products"])
 app.include_router(roles_router, prefix="/roles")
+app.include_router(internal_router, prefix="/internal", tags=["internal"], include_in_schema=False)
+app.include_router(metrics_router, include_in_schema=False)
+app.include_router(health_router, prefix="/health", include_in_schema=False)
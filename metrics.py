@@ -0,0 +1,62 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        result = []
+        total = 0
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self) -> dict:
+        return {"buckets": dict(self.cumulative()), "sum": self.sum, "count": self.count}
+
+
+class RequestTimings:
+    """Time and number of calls spent per phase (jwt, db, redis, bcrypt, ...) within one request."""
+
+    __slots__ = ("phases", "calls")
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+
+    def record(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+
+
+request_timings: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def record_phase(phase: str, seconds: float):
+    timings = request_timings.get()
+    if timings is not None:
+        timings.record(phase, seconds)
+
+
+@contextmanager
+def timed_phase(phase: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - started)
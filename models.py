@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, UniqueConstraint, Enum
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, UniqueConstraint, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -35,7 +35,7 @@ class Role(Base):
     id = Column(Integer, primary_key=True)
     name = Column(Enum(RoleType), unique=True, nullable=False)
 
-    users = relationship("User", back_populates="role", uselist=True, lazy='selectin')
+    users = relationship("User", back_populates="role", uselist=True, lazy='raise')
 
 
 class BusinessObject(Base):
@@ -64,4 +64,20 @@ class AccessRule(Base):
 
     __table_args__ = (
         UniqueConstraint('role_id', 'business_object_id'),
+        Index('ix_access_rules_business_object_id_id', 'business_object_id', 'id'),
+    )
+
+
+class Product(Base):
+    __tablename__ = 'products'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    description = Column(String, nullable=False, default="")
+    price = Column(Integer, nullable=False)
+    owner_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+
+    __table_args__ = (
+        Index('ix_products_owner_id_id', 'owner_id', 'id'),
+        Index('ix_products_price_id', 'price', 'id'),
     )
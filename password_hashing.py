@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from fastapi import HTTPException, status
+
+from metrics import timed_phase
+from settings import get_settings
+
+settings = get_settings()
+
+
+# bcrypt releases the GIL while hashing, so plain threads give real parallelism.
+_executor = ThreadPoolExecutor(max_workers=settings.hashing_workers, thread_name_prefix="bcrypt")
+_slots = threading.BoundedSemaphore(settings.hashing_workers + settings.hashing_queue_size)
+
+
+def hash_password(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    try:
+        return int(hashed_password.split("$")[2]) != settings.bcrypt_rounds
+    except (IndexError, ValueError):
+        return True
+
+
+def _unavailable() -> HTTPException:
+    return HTTPException(
+        detail="Password hashing is overloaded, try again later",
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _run_in_pool(func, *args):
+    if not _slots.acquire(blocking=False):
+        raise _unavailable()
+    try:
+        future = _executor.submit(func, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    # The slot is held until the work really finishes, even if the caller times out.
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), settings.hashing_timeout_seconds)
+    except asyncio.TimeoutError:
+        raise _unavailable()
+
+
+async def hash_password_async(password: str) -> str:
+    with timed_phase("bcrypt"):
+        return await _run_in_pool(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    with timed_phase("bcrypt"):
+        return await _run_in_pool(verify_password, password, hashed_password)
+
+
+async def warm_up():
+    """Start every hashing thread and run bcrypt once in each before the first sign-up or login needs them."""
+    await asyncio.gather(*(_run_in_pool(hash_password, "warm-up") for _ in range(settings.hashing_workers)))
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+
+from access_matrix import reload_access_matrix
+from catalogue import reload_business_object_catalogue, reload_role_catalogue
+from db import AsyncSessionLocal
+from etags import reload_versions
+from principal import PRINCIPAL_CHANNEL, forget_principal, principal_cache
+from redis_client import redis_client
+
+POLICY_CHANNEL = "policy"
+
+logger = logging.getLogger(__name__)
+
+
+async def reload_policy():
+    """Load the access matrix, the role and business object catalogues and the ETag versions of this process."""
+    async with AsyncSessionLocal() as session:
+        await reload_access_matrix(session)
+        await reload_role_catalogue(session)
+        await reload_business_object_catalogue(session)
+        await reload_versions(session)
+
+
+async def publish_policy_change():
+    """Ask every worker of every instance to reload its access matrix and catalogues."""
+    await redis_client.publish(POLICY_CHANNEL, "reload")
+
+
+async def announce_policy_change():
+    """Reload the policy of this worker and notify the other workers after an access rule change was committed."""
+    # the change is already committed, so the write must not fail here; a worker that misses the
+    # notification catches up with the next published change or restart
+    try:
+        await reload_policy()
+    except Exception:
+        logger.warning("Could not reload the policy after an access rule change", exc_info=True)
+    try:
+        await publish_policy_change()
+    except Exception:
+        logger.warning("Could not announce the access rule change", exc_info=True)
+
+
+class PolicyListener:
+    """Reloads the in-process policy whenever a change is published on POLICY_CHANNEL and drops the
+    cached principal of every user id published on PRINCIPAL_CHANNEL.
+
+    After a lost subscription the policy is reloaded once more and the principal cache is cleared,
+    since messages published while it was down are not replayed. start() returns once the channels are
+    subscribed, so a policy loaded after it never misses a change committed in between.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._reloading: asyncio.Future | None = None
+        self._subscribed: asyncio.Event | None = None
+        self._stopping = False
+
+    async def _reload(self):
+        # shielded so that stop() never abandons a reload with a query half way through
+        self._reloading = asyncio.ensure_future(reload_policy())
+        await asyncio.shield(self._reloading)
+
+    async def _listen(self):
+        resubscribed = False
+        while not self._stopping:
+            pubsub = redis_client.pubsub()
+            try:
+                await pubsub.subscribe(POLICY_CHANNEL, PRINCIPAL_CHANNEL)
+                self._subscribed.set()
+                if resubscribed:
+                    principal_cache.clear()
+                    await self._reload()
+                # get_message(timeout=...) may swallow a cancellation, so stop() also raises a flag
+                while not self._stopping:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    if message["channel"] == PRINCIPAL_CHANNEL.encode():
+                        forget_principal(int(message["data"]))
+                    else:
+                        await self._reload()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Policy subscription lost, reconnecting", exc_info=True)
+                resubscribed = True
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._subscribed = asyncio.Event()
+            self._task = asyncio.create_task(self._listen())
+        await self._subscribed.wait()
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._reloading is not None:
+            await asyncio.gather(self._reloading, return_exceptions=True)
+            self._reloading = None
+
+
+policy_listener = PolicyListener()
@@ -0,0 +1,72 @@
+import logging
+
+from sqlalchemy import select, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import TTLCache
+from db import AsyncSessionLocal
+from models import User, Role, RoleType
+from redis_client import redis_client
+from settings import get_settings
+
+settings = get_settings()
+
+PRINCIPAL_CHANNEL = "principal"
+
+logger = logging.getLogger(__name__)
+
+
+class Principal:
+    """Authenticated caller as seen by authorization: user columns only, no ORM relationships."""
+
+    __slots__ = ("id", "role_id", "role_name", "is_active")
+
+    def __init__(self, id: int, role_id: int | None, role_name: RoleType | None, is_active: bool):
+        self.id = id
+        self.role_id = role_id
+        self.role_name = role_name
+        self.is_active = is_active
+
+    def __repr__(self) -> str:
+        return f"Principal(id={self.id}, role_id={self.role_id}, role_name={self.role_name}, is_active={self.is_active})"
+
+
+principal_statement = (
+    select(User.id, User.role_id, Role.name, User.is_active)
+    .outerjoin(Role, User.role_id == Role.id)
+    .where(User.id == bindparam("user_id"))
+)
+
+
+async def load_principal(session: AsyncSession, user_id: int) -> Principal | None:
+    row = (await session.execute(principal_statement, {"user_id": user_id})).one_or_none()
+    return Principal(*row) if row else None
+
+
+principal_cache = TTLCache(maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl_seconds)
+
+
+async def get_cached_principal(user_id: int) -> Principal | None:
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        # read-after-write: a lagging replica could return a just deactivated user as active, or no row
+        # for a user who has just signed up, and the cache would keep that answer for the whole TTL
+        async with AsyncSessionLocal() as session:
+            principal = await load_principal(session, user_id)
+        if principal is not None:
+            principal_cache.set(user_id, principal)
+    return principal
+
+
+def forget_principal(user_id: int):
+    principal_cache.pop(user_id)
+
+
+async def invalidate_principal(user_id: int):
+    """Drop the cached principal in this process and, through PRINCIPAL_CHANNEL, in every other worker."""
+    forget_principal(user_id)
+    try:
+        await redis_client.publish(PRINCIPAL_CHANNEL, str(user_id))
+    except Exception:
+        # the change is already committed; other workers catch up within principal_cache_ttl_seconds
+        logger.warning("Could not publish the invalidation of principal %s", user_id, exc_info=True)
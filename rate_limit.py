@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import math
+import uuid
+
+from fastapi import HTTPException, Request, status
+
+from redis_client import redis_client
+from settings import get_settings
+
+RATE_LIMIT_KEY_PREFIX = "rate:"
+# "<requests>/<seconds>" per route and key, overridable as RATE_LIMIT_<ROUTE>_<KEY>; "0" disables a limit
+DEFAULT_RATE_LIMITS = {
+    "login": {"ip": "20/60", "email": "5/60"},
+    "sign_up": {"ip": "10/60", "email": "3/3600"},
+}
+
+logger = logging.getLogger(__name__)
+
+# KEYS: one sorted set per limit; ARGV: member, then limit and window in ms for every key.
+# Either every window has room and the request is recorded in all of them, or none is touched
+# and the script returns the ms until the fullest window frees a slot.
+SLIDING_WINDOW_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= limit then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        retry_after = math.max(retry_after, tonumber(oldest[2]) + window - now)
+    end
+end
+if retry_after > 0 then
+    return retry_after
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[1])
+    redis.call('PEXPIRE', key, ARGV[i * 2 + 1])
+end
+return 0
+"""
+
+sliding_window_script = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+
+
+def _parse_limit(value: str) -> tuple[int, int] | None:
+    if value.strip() == "0":
+        return None
+    requests, seconds = value.split("/")
+    return int(requests), int(seconds) * 1000
+
+
+def _limits(route: str) -> dict[str, tuple[int, int]]:
+    limits = {}
+    for key, default in DEFAULT_RATE_LIMITS[route].items():
+        limit = _parse_limit(get_settings().rate_limits.get(f"{route}_{key}", default))
+        if limit is not None:
+            limits[key] = limit
+    return limits
+
+
+async def _email(request: Request) -> str | None:
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+def rate_limit(route: str):
+    """Dependency enforcing the sliding-window limits of a route per client IP and per email in the body.
+
+    It runs before the endpoint, so a throttled request never reaches password hashing.
+    """
+    limits = _limits(route)
+
+    async def check_rate_limit(request: Request):
+        identities = {"ip": request.client.host if request.client else None}
+        if "email" in limits:
+            identities["email"] = await _email(request)
+
+        keys, args = [], [uuid.uuid4().hex]
+        for key, (requests, window_ms) in limits.items():
+            identity = identities.get(key)
+            if identity is None:
+                continue
+            digest = hashlib.blake2b(identity.encode('utf-8'), digest_size=16).hexdigest()
+            keys.append(f"{RATE_LIMIT_KEY_PREFIX}{route}:{key}:{digest}")
+            args += [requests, window_ms]
+        if not keys:
+            return
+
+        try:
+            retry_after_ms = await redis_client.run_script(sliding_window_script, keys=keys, args=args)
+        except Exception:
+            # throttling protects the CPU, it must not take login down with Redis
+            logger.warning("Rate limit check failed, letting the request through", exc_info=True)
+            return
+        if retry_after_ms:
+            raise HTTPException(
+                detail="Too many requests",
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(math.ceil(retry_after_ms / 1000))},
+            )
+
+    return check_rate_limit
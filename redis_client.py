@@ -1,23 +1,141 @@
-from dotenv import load_dotenv
-import os
-from redis.asyncio import Redis
+import asyncio
+import time
+from collections import defaultdict
 
-load_dotenv()
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from metrics import Histogram, record_phase, timed_phase
+from settings import get_settings
+
+settings = get_settings()
 
 
 class RedisClient:
     def __init__(self):
         self.redis: Redis = Redis(
-            host=os.getenv('REDIS_HOST'),
-            port=int(os.getenv('REDIS_PORT')),
-            db=int(os.getenv('REDIS_DB')),
+            connection_pool=BlockingConnectionPool(
+                host=settings.redis_host,
+                port=settings.redis_port,
+                db=settings.redis_db,
+                max_connections=settings.redis_max_connections,
+                timeout=settings.redis_pool_timeout,
+            )
         )
+        self.latency: defaultdict[str, Histogram] = defaultdict(Histogram)
+        # keys waiting for the next MGET; a GET never joins an MGET already on the wire, which may have been
+        # sent before the caller's own write
+        self._pending: dict[str, asyncio.Future] = {}
+        self._flush_handle: asyncio.Handle | None = None
+        self._flush_tasks: set[asyncio.Task] = set()
+
+    async def _timed(self, command: str, awaitable, request_phase: bool = True):
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            elapsed = time.perf_counter() - started
+            self.latency[command].observe(elapsed)
+            if request_phase:
+                record_phase("redis", elapsed)
 
     async def setex(self, key: str, value: str, time: int):
-        await self.redis.setex(key, time, value)
+        await self._timed("SETEX", self.redis.setex(key, time, value))
+
+    async def setex_many(self, values: dict[str, str], time: int):
+        """SETEX every key in one MULTI/EXEC transaction, so either all of them are written or none."""
+        pipeline = self.redis.pipeline(transaction=True)
+        for key, value in values.items():
+            pipeline.setex(key, time, value)
+        await self._timed("MULTI", pipeline.execute())
 
     async def get(self, key: str):
-        return await self.redis.get(key)
+        """GET coalesced with concurrent calls into one MGET; callers of the same key share one lookup.
+
+        The MGET is sent at the end of the current loop iteration, or after REDIS_COALESCE_WINDOW_SECONDS
+        when a window is configured.
+        """
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            future.add_done_callback(_consume_exception)
+            self._pending[key] = future
+            if self._flush_handle is None:
+                window = settings.redis_coalesce_window_seconds
+                self._flush_handle = (
+                    loop.call_later(window, self._start_flush) if window > 0 else loop.call_soon(self._start_flush)
+                )
+        # the MGET itself runs in the context of whichever request scheduled the flush
+        with timed_phase("redis"):
+            return await asyncio.shield(future)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        task = asyncio.create_task(self._flush(batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, batch: dict[str, asyncio.Future]):
+        keys = list(batch)
+        try:
+            values = await self._timed("MGET", self.redis.mget(keys), request_phase=False)
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for key, value in zip(keys, values):
+                if not batch[key].done():
+                    batch[key].set_result(value)
+
+    async def incr(self, key: str) -> int:
+        return await self._timed("INCR", self.redis.incr(key))
+
+    async def setnx(self, key: str, value: str) -> bool:
+        return bool(await self._timed("SET", self.redis.set(key, value, nx=True)))
+
+    async def delete(self, key: str):
+        await self._timed("DEL", self.redis.delete(key))
+
+    def register_script(self, script: str):
+        return self.redis.register_script(script)
+
+    async def run_script(self, script, keys: list, args: list):
+        # run on the current client so that a replaced self.redis is honoured
+        return await self._timed("EVALSHA", script(keys=keys, args=args, client=self.redis))
+
+    async def publish(self, channel: str, message: str):
+        await self._timed("PUBLISH", self.redis.publish(channel, message))
+
+    async def ping(self):
+        await self._timed("PING", self.redis.ping(), request_phase=False)
+
+    async def open_pool(self, size: int):
+        """Open size connections at once; they stay in the pool for the first requests."""
+        await asyncio.gather(*(self.ping() for _ in range(min(size, settings.redis_max_connections))))
+
+    async def close(self):
+        await self.redis.aclose()
+
+    def pubsub(self):
+        return self.redis.pubsub(ignore_subscribe_messages=True)
+
+    def scan_iter(self, match: str, count: int = 1000):
+        return self.redis.scan_iter(match=match, count=count)
+
+    def stats(self) -> dict:
+        return {
+            "max_connections": settings.redis_max_connections,
+            "coalesce_window_seconds": settings.redis_coalesce_window_seconds,
+            "commands": {command: histogram.snapshot() for command, histogram in self.latency.items()},
+        }
+
+
+def _consume_exception(future: asyncio.Future):
+    # Every waiter may have been cancelled; mark the error as retrieved to keep the loop quiet.
+    if not future.cancelled():
+        future.exception()
 
 
 redis_client = RedisClient()
@@ -0,0 +1,95 @@
+import hashlib
+import logging
+import secrets
+import uuid
+
+from redis_client import redis_client
+from settings import get_settings
+
+settings = get_settings()
+
+REFRESH_TOKEN_KEY_PREFIX = "refresh:"
+REFRESH_FAMILY_KEY_PREFIX = "refresh_family:"
+
+logger = logging.getLogger(__name__)
+
+# KEYS: family, new token; ARGV: presented digest, new digest, new token record, ttl.
+# Only the latest token of a family may be rotated; presenting any older one deletes the family.
+ROTATE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then
+    return 0
+end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[4])
+redis.call('SET', KEYS[2], ARGV[3], 'EX', ARGV[4])
+return 1
+"""
+
+
+class RefreshTokenError(Exception):
+    pass
+
+
+def _digest(token: str) -> str:
+    return hashlib.blake2b(token.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class RefreshTokenStore:
+    """Opaque refresh tokens grouped into families, one family per login.
+
+    Redis keeps every issued token as refresh:<digest> -> "<family>:<user id>" and the digest of
+    the only token of the family that may still be used as refresh_family:<family>. Rotation
+    swaps the latter atomically, so a second use of a rotated token is detected as reuse and
+    revokes the whole family. Nothing here is consulted when an access token is verified.
+    """
+
+    def __init__(self):
+        self._rotate = redis_client.register_script(ROTATE_SCRIPT)
+
+    async def issue(self, user_id: int) -> str:
+        token = secrets.token_urlsafe(32)
+        digest, family = _digest(token), uuid.uuid4().hex
+        await redis_client.setex_many(
+            {REFRESH_FAMILY_KEY_PREFIX + family: digest, REFRESH_TOKEN_KEY_PREFIX + digest: f"{family}:{user_id}"},
+            settings.refresh_token_expire_seconds,
+        )
+        return token
+
+    async def _lookup(self, token: str) -> tuple[str, str, int]:
+        digest = _digest(token)
+        record = await redis_client.get(REFRESH_TOKEN_KEY_PREFIX + digest)
+        if record is None:
+            raise RefreshTokenError("Invalid refresh token")
+        family, user_id = (record.decode('utf-8') if isinstance(record, bytes) else record).split(":")
+        return digest, family, int(user_id)
+
+    async def rotate(self, token: str) -> tuple[int, str]:
+        """Exchange a refresh token for the next one of its family; return the user id and the new token."""
+        digest, family, user_id = await self._lookup(token)
+        new_token = secrets.token_urlsafe(32)
+        new_digest = _digest(new_token)
+        rotated = await redis_client.run_script(
+            self._rotate,
+            keys=[REFRESH_FAMILY_KEY_PREFIX + family, REFRESH_TOKEN_KEY_PREFIX + new_digest],
+            args=[digest, new_digest, f"{family}:{user_id}", settings.refresh_token_expire_seconds],
+        )
+        if rotated == -1:
+            logger.warning("Refresh token reuse detected for user %s, family %s revoked", user_id, family)
+        if rotated != 1:
+            raise RefreshTokenError("Invalid refresh token")
+        return user_id, new_token
+
+    async def revoke(self, token: str):
+        """Revoke the family of a refresh token; unknown tokens are ignored."""
+        try:
+            _, family, _ = await self._lookup(token)
+        except RefreshTokenError:
+            return
+        await redis_client.delete(REFRESH_FAMILY_KEY_PREFIX + family)
+
+
+refresh_token_store = RefreshTokenStore()
@@ -0,0 +1,109 @@
+import time
+from collections import defaultdict
+
+from starlette.datastructures import MutableHeaders
+
+from auth_utils import get_route_auth
+from metrics import Histogram, RequestTimings, request_timings
+
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+# per request resource phases whose number of calls is exported as well as their time
+COUNTED_PHASES = {"db": "sql_queries", "redis": "redis_commands"}
+# the method comes straight from the client, so anything else is reported as "other" to keep the label set bounded
+METHOD_LABELS = frozenset({"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"})
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestMetrics:
+    """Per route and business object histograms of request duration, phase timings and call counts."""
+
+    def __init__(self):
+        self.duration: defaultdict[tuple, Histogram] = defaultdict(Histogram)
+        self.phases: defaultdict[tuple, Histogram] = defaultdict(Histogram)
+        self.calls: defaultdict[tuple, Histogram] = defaultdict(lambda: Histogram(COUNT_BUCKETS))
+
+    def observe(self, method: str, route: str, business_object: str, timings: RequestTimings, seconds: float):
+        labels = (method, route, business_object)
+        self.duration[labels].observe(seconds)
+        for phase, phase_seconds in timings.phases.items():
+            self.phases[(*labels, phase)].observe(phase_seconds)
+        for phase, name in COUNTED_PHASES.items():
+            self.calls[(*labels, name)].observe(timings.calls.get(phase, 0))
+
+    def render(self) -> str:
+        lines = []
+        label_names = ("method", "route", "business_object")
+
+        def histogram_family(name: str, help_text: str, histograms: dict, extra_label: str | None = None):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in sorted(histograms.items()):
+                names = label_names + ((extra_label,) if extra_label else ())
+                labels = ",".join(f'{label}="{_escape(str(value))}"' for label, value in zip(names, key))
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        histogram_family("http_request_duration_seconds", "Request latency.", self.duration)
+        histogram_family(
+            "http_request_phase_seconds", "Time spent per phase of a request.", self.phases, "phase"
+        )
+        calls_by_name = defaultdict(dict)
+        for (*labels, name), histogram in self.calls.items():
+            calls_by_name[name][tuple(labels)] = histogram
+        for name in COUNTED_PHASES.values():
+            histogram_family(f"http_request_{name}", f"Number of {name.replace('_', ' ')} per request.",
+                             calls_by_name[name])
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+def server_timing(timings: RequestTimings, total_seconds: float) -> str:
+    entries = []
+    for phase, seconds in timings.phases.items():
+        entry = f"{phase};dur={seconds * 1000:.3f}"
+        if phase in COUNTED_PHASES:
+            entry += f';desc="{timings.calls[phase]} calls"'
+        entries.append(entry)
+    entries.append(f"total;dur={total_seconds * 1000:.3f}")
+    return ", ".join(entries)
+
+
+class RequestMetricsMiddleware:
+    """Collects per-phase timings of each request into a Server-Timing header and request_metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_server_timing(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(timings, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            request_timings.reset(token)
+            method = scope["method"] if scope["method"] in METHOD_LABELS else "other"
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            route_auth = get_route_auth(route_path, method)
+            request_metrics.observe(
+                method, route_path, route_auth.tag if route_auth else "", timings, time.perf_counter() - started,
+            )
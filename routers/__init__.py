@@ -3,3 +3,6 @@ from .products_router import products_router
 from .profiles_router import profiles_router
 from .auth_router import auth_router
 from .roles_router import roles_router
+from .internal_router import internal_router
+from .metrics_router import metrics_router
+from .health_router import health_router
@@ -1,54 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, and_
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Boolean, Integer, select, update, and_, bindparam, cast, column, func, values
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
-from auth_utils import get_current_user, get_role, check_access_rights
+from access_matrix import permission_columns
+from auth_utils import authorize
+from catalogue import get_business_object_catalogue, get_role_catalogue
 from db import get_session
-from models import AccessRule, User, Role
-from schemas.access_rules_schemas import AccessRuleResponse, AccessRuleCreate, AccessRulePatch
+from etags import conditional_get
+from models import AccessRule, Role, BusinessObject
+from policy_listener import announce_policy_change
+from principal import Principal
+from schemas.access_rules_schemas import (
+    AccessRuleResponse, AccessRuleCreate, AccessRulePatch, AccessRuleBulkPatch, AccessRuleBulkResponse,
+    AccessRuleConflict, access_rule_list_adapter,
+)
+from schemas.business_object import BusinessObjectResponse
+from schemas.role_schemas import RoleResponse
+from serialization import fast_json_response
 
 
+ACCESS_RULES_PAGE_SIZE = 100
+ACCESS_RULES_MAX_PAGE_SIZE = 1000
+ACCESS_RULES_STREAM_BATCH_SIZE = 500
+ACCESS_RULES_BULK_MAX_SIZE = 1000
+
 access_rules_router = APIRouter()
 
+# role and business object in the same query instead of the model's selectin loads, one SQL query per listing
+access_rules_statement = select(AccessRule).options(
+    joinedload(AccessRule.role), joinedload(AccessRule.business_object)
+)
+my_access_rules_statement = access_rules_statement.where(AccessRule.role_id == bindparam("role_id"))
+access_rule_row_statement = (
+    select(
+        AccessRule.id,
+        *permission_columns.values(),
+        Role.id.label("role_id"),
+        Role.name.label("role_name"),
+        BusinessObject.id.label("business_object_id"),
+        BusinessObject.name.label("business_object_name"),
+    )
+    .join(Role, AccessRule.role_id == Role.id)
+    .join(BusinessObject, AccessRule.business_object_id == BusinessObject.id)
+)
+access_rule_exists_statement = select(AccessRule.id).where(
+    and_(
+        AccessRule.role_id == bindparam("role_id"),
+        AccessRule.business_object_id == bindparam("business_object_id")
+    )
+)
+access_rule_by_id_statement = select(AccessRule).where(AccessRule.id == bindparam("id"))
+access_rules_by_ids_statement = (
+    select(AccessRule).where(AccessRule.id.in_(bindparam("ids", expanding=True))).order_by(AccessRule.id)
+)
+
 
 @access_rules_router.get("/my", response_model=list[AccessRuleResponse])
 async def get_my_access_rules(
-    role: Role = Depends(get_role),
+    response: Response,
+    principal: Principal = Depends(authorize),
+    _=Depends(conditional_get("access_rules", per_role=True)),
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
-    _=Depends(check_access_rights),
 ):
     access_rules = (
-        await session.execute(select(AccessRule).where(AccessRule.role_id == role.id))
+        await session.execute(my_access_rules_statement, {"role_id": principal.role_id})
     ).scalars().all()
-    return access_rules
+    return fast_json_response(access_rule_list_adapter, access_rules, response)
+
+
+def filter_access_rules(statement, after_id: int | None, role_id: int | None, business_object_id: int | None):
+    if after_id is not None:
+        statement = statement.where(AccessRule.id > after_id)
+    if role_id is not None:
+        statement = statement.where(AccessRule.role_id == role_id)
+    if business_object_id is not None:
+        statement = statement.where(AccessRule.business_object_id == business_object_id)
+    return statement.order_by(AccessRule.id)
+
+
+async def stream_access_rules(session: AsyncSession, statement):
+    result = await session.stream(statement.execution_options(yield_per=ACCESS_RULES_STREAM_BATCH_SIZE))
+    async for row in result:
+        access_rule = AccessRuleResponse(
+            **{column.key: getattr(row, column.key) for column in permission_columns.values()},
+            id=row.id,
+            role=RoleResponse(id=row.role_id, name=row.role_name),
+            business_object=BusinessObjectResponse(id=row.business_object_id, name=row.business_object_name),
+        )
+        yield access_rule.model_dump_json() + "\n"
 
 
 @access_rules_router.get("", response_model=list[AccessRuleResponse])
 async def get_access_rules(
+    response: Response,
+    after_id: int | None = None,
+    limit: int = Query(default=ACCESS_RULES_PAGE_SIZE, ge=1, le=ACCESS_RULES_MAX_PAGE_SIZE),
+    role_id: int | None = None,
+    business_object_id: int | None = None,
+    stream: bool = Query(default=False, description="Stream all matching rules as NDJSON, ignoring limit"),
+    principal: Principal = Depends(authorize),
+    _=Depends(conditional_get("access_rules")),
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
-    _=Depends(check_access_rights),
 ):
-    access_rules = (await session.execute(select(AccessRule))).scalars().all()
-    return access_rules
+    if stream:
+        statement = filter_access_rules(access_rule_row_statement, after_id, role_id, business_object_id)
+        return StreamingResponse(stream_access_rules(session, statement), media_type="application/x-ndjson")
+
+    statement = filter_access_rules(access_rules_statement, after_id, role_id, business_object_id).limit(limit)
+    access_rules = (await session.execute(statement)).scalars().all()
+    if len(access_rules) == limit:
+        response.headers["X-Next-Cursor"] = str(access_rules[-1].id)
+    return fast_json_response(access_rule_list_adapter, access_rules, response)
 
 
 @access_rules_router.post("", response_model=AccessRuleResponse)
 async def create_access_rule(
     access_rule_create: AccessRuleCreate,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
-    _=Depends(check_access_rights),
+    principal: Principal = Depends(authorize),
 ):
     exists = (
         await session.execute(
-            select(AccessRule).where(
-                and_(
-                    AccessRule.role_id == access_rule_create.role_id,
-                    AccessRule.business_object_id == access_rule_create.business_object_id
-                )
-            )
+            access_rule_exists_statement,
+            {"role_id": access_rule_create.role_id, "business_object_id": access_rule_create.business_object_id}
         )
     ).scalars().all()
     if exists:
@@ -62,19 +139,125 @@ async def create_access_rule(
     session.add(new_access_rule)
     await session.commit()
     await session.refresh(new_access_rule)
+    await announce_policy_change()
     return new_access_rule
 
 
+async def finish_bulk_change(session: AsyncSession, access_rule_ids: list[int], conflicts: list[AccessRuleConflict]):
+    await session.commit()
+    access_rules = []
+    if access_rule_ids:
+        access_rules = (
+            await session.execute(access_rules_by_ids_statement, {"ids": access_rule_ids})
+        ).scalars().all()
+        await announce_policy_change()
+    return {"applied": access_rules, "conflicts": sorted(conflicts, key=lambda conflict: conflict.index)}
+
+
+@access_rules_router.post("/bulk", response_model=AccessRuleBulkResponse)
+async def create_access_rules_bulk(
+    access_rules_create: list[AccessRuleCreate] = Body(min_length=1, max_length=ACCESS_RULES_BULK_MAX_SIZE),
+    session: AsyncSession = Depends(get_session),
+    principal: Principal = Depends(authorize),
+):
+    # roles and business objects only change through sync_policy and fill_db_data, which publish a policy change
+    roles, business_objects = get_role_catalogue(), get_business_object_catalogue()
+    conflicts = []
+    rows = {}
+    for index, rule in enumerate(access_rules_create):
+        key = (rule.role_id, rule.business_object_id)
+        if roles.get(rule.role_id) is None:
+            conflicts.append(AccessRuleConflict(index=index, detail=f"No role with id = {rule.role_id}"))
+        elif business_objects.get(rule.business_object_id) is None:
+            conflicts.append(
+                AccessRuleConflict(index=index, detail=f"No business object with id = {rule.business_object_id}")
+            )
+        elif key in rows:
+            duplicate_of, _ = rows[key]
+            conflicts.append(
+                AccessRuleConflict(index=index, detail=f"Duplicate of access rule at index {duplicate_of}")
+            )
+        else:
+            rows[key] = index, rule.model_dump()
+
+    created_ids = []
+    if rows:
+        # rows that hit the unique constraint are skipped and simply not returned
+        created = (
+            await session.execute(
+                insert(AccessRule)
+                .values([row for _, row in rows.values()])
+                .on_conflict_do_nothing(index_elements=[AccessRule.role_id, AccessRule.business_object_id])
+                .returning(AccessRule.id, AccessRule.role_id, AccessRule.business_object_id)
+            )
+        ).all()
+        created_ids = [access_rule_id for access_rule_id, _, _ in created]
+        created_keys = {(role_id, business_object_id) for _, role_id, business_object_id in created}
+        for key, (index, _) in rows.items():
+            if key not in created_keys:
+                role_id, business_object_id = key
+                conflicts.append(AccessRuleConflict(
+                    index=index,
+                    detail=f"Access rule with role_id = {role_id} and "
+                           f"business_object_id = {business_object_id} already exists",
+                ))
+    return await finish_bulk_change(session, created_ids, conflicts)
+
+
+@access_rules_router.patch("/bulk", response_model=AccessRuleBulkResponse)
+async def update_access_rules_bulk(
+    access_rule_patches: list[AccessRuleBulkPatch] = Body(min_length=1, max_length=ACCESS_RULES_BULK_MAX_SIZE),
+    session: AsyncSession = Depends(get_session),
+    principal: Principal = Depends(authorize),
+):
+    conflicts = []
+    rows = {}
+    for index, access_rule_patch in enumerate(access_rule_patches):
+        if access_rule_patch.id in rows:
+            duplicate_of, _ = rows[access_rule_patch.id]
+            conflicts.append(
+                AccessRuleConflict(index=index, detail=f"Duplicate of access rule at index {duplicate_of}")
+            )
+        else:
+            rows[access_rule_patch.id] = index, access_rule_patch
+
+    # one UPDATE ... FROM a VALUES list for all rows; a NULL in the list keeps the current value
+    keys = [permission_column.key for permission_column in permission_columns.values()]
+    patch_values = values(
+        column("id", Integer), *(column(key, Boolean) for key in keys), name="patch"
+    ).data([
+        (access_rule_id, *(getattr(access_rule_patch, key) for key in keys))
+        for access_rule_id, (_, access_rule_patch) in rows.items()
+    ]).cte("patch")
+    updated_ids = list((
+        await session.execute(
+            update(AccessRule)
+            .where(AccessRule.id == patch_values.c.id)
+            .values({
+                permission_column: func.coalesce(cast(patch_values.c[key], Boolean), permission_column)
+                for key, permission_column in zip(keys, permission_columns.values())
+            })
+            .returning(AccessRule.id)
+            .execution_options(synchronize_session=False)
+        )
+    ).scalars())
+
+    updated = set(updated_ids)
+    for access_rule_id, (index, _) in rows.items():
+        if access_rule_id not in updated:
+            conflicts.append(AccessRuleConflict(index=index, detail=f"No access rule with id = {access_rule_id}"))
+    return await finish_bulk_change(session, updated_ids, conflicts)
+
+
 @access_rules_router.patch("/{id}", response_model=AccessRuleResponse)
 async def update_access_rules(
     id: int,
     access_rule_patch: AccessRulePatch,
     session: AsyncSession = Depends(get_session),
-    user: User = Depends(get_current_user),
-    _=Depends(check_access_rights),
+    principal: Principal = Depends(authorize),
 ):
     access_rule = (
-        await session.execute(select(AccessRule).where(AccessRule.id == id))
+        await session.execute(access_rule_by_id_statement, {"id": id})
     ).scalars().one_or_none()
     if access_rule is None:
         raise HTTPException(detail=f"No access rule with id = {id}", status_code=status.HTTP_404_NOT_FOUND)
@@ -85,4 +268,5 @@ async def update_access_rules(
 
     await session.commit()
     await session.refresh(access_rule)
+    await announce_policy_change()
     return access_rule
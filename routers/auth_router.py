@@ -1,55 +1,65 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import select, insert, bindparam
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-import bcrypt
+from sqlalchemy.orm import raiseload
 
 from db import get_session
-from auth_utils import hash_password, create_jwt_token, get_current_user, TOKEN_EXPIRE_SECONDS, get_token
-from models import User, Role, RoleType
-from redis_client import redis_client
-from schemas.user_schemas import UserResponse, UserRequest, TokenResponse, UserLoginRequest
+from auth_utils import create_jwt_token
+from catalogue import get_role_catalogue
+from models import User, RoleType
+from password_hashing import hash_password_async, verify_password_async, needs_rehash
+from principal import load_principal
+from rate_limit import rate_limit
+from refresh_tokens import RefreshTokenError, refresh_token_store
+from schemas.user_schemas import UserRequest, TokenResponse, UserLoginRequest, RefreshTokenRequest
+from settings import get_settings
 
 auth_router = APIRouter()
 
+insert_user_statement = insert(User).returning(User.id)
+login_user_statement = select(User).options(raiseload(User.role)).where(User.email == bindparam("email"))
 
-@auth_router.post("/sign-up", response_model=TokenResponse)
+
+def token_response(user_id: int, refresh_token: str) -> TokenResponse:
+    return TokenResponse(
+        token=create_jwt_token({"id": user_id}),
+        refresh_token=refresh_token,
+        expires_in=get_settings().token_expire_seconds,
+    )
+
+
+@auth_router.post("/sign-up", response_model=TokenResponse, dependencies=[Depends(rate_limit("sign_up"))])
 async def sign_up(user_request: UserRequest, session: AsyncSession = Depends(get_session)):
-    exists = (
-        await session.execute(
-            select(User).where(User.email == user_request.email)
-        )
-    ).scalars().all()
-    if exists:
+    role = get_role_catalogue().get(user_request.role_id)
+    if role is None:
         raise HTTPException(
-            detail="User with such login already exists",
+            detail=f"No role with id = {user_request.role_id}",
             status_code=status.HTTP_400_BAD_REQUEST
         )
-
-    role = (
-        await session.execute(select(Role).where(Role.id == user_request.role_id))
-    ).scalars().one()
-    if role.name == RoleType.ADMIN:
+    if role == RoleType.ADMIN:
         raise HTTPException(detail="You cannot choose ADMIN role", status_code=status.HTTP_400_BAD_REQUEST)
-    user_request.role_id = role.id
 
     user_data = user_request.model_dump(exclude={'password'})
-    user = User(**user_data, hashed_password=hash_password(user_request.password))
+    user_data["hashed_password"] = await hash_password_async(user_request.password)
 
-    session.add(user)
-    await session.commit()
-    await session.refresh(user)
+    # a single autocommitted INSERT ... RETURNING; the unique email constraint replaces the existence check
+    await session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+    try:
+        user_id = (await session.execute(insert_user_statement, user_data)).scalar_one()
+    except IntegrityError:
+        raise HTTPException(
+            detail="User with such login already exists",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
 
-    token_data = {"id": user.id}
-    token = create_jwt_token(token_data)
-    return TokenResponse(token=token)
+    return token_response(user_id, await refresh_token_store.issue(user_id))
 
 
-@auth_router.post("/login", response_model=TokenResponse)
+@auth_router.post("/login", response_model=TokenResponse, dependencies=[Depends(rate_limit("login"))])
 async def login(user_login_request: UserLoginRequest, session: AsyncSession = Depends(get_session)):
     user: User = (
-        await session.execute(
-            select(User).where(User.email == user_login_request.email)
-        )
+        await session.execute(login_user_statement, {"email": user_login_request.email})
     ).scalars().one_or_none()
     if not user:
         raise HTTPException(
@@ -57,10 +67,7 @@ async def login(user_login_request: UserLoginRequest, session: AsyncSession = De
             status_code=status.HTTP_400_BAD_REQUEST
         )
 
-    if not bcrypt.checkpw(
-        user_login_request.password.encode('utf-8'),
-        user.hashed_password.encode('utf-8')
-    ):
+    if not await verify_password_async(user_login_request.password, user.hashed_password):
         raise HTTPException(
             detail="No user with such login or password",
             status_code=status.HTTP_400_BAD_REQUEST
@@ -72,11 +79,27 @@ async def login(user_login_request: UserLoginRequest, session: AsyncSession = De
             status_code=status.HTTP_403_FORBIDDEN
         )
 
-    token_data = {"id": user.id}
-    token = create_jwt_token(token_data)
-    return TokenResponse(token=token)
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password_async(user_login_request.password)
+        await session.commit()
+    return token_response(user.id, await refresh_token_store.issue(user.id))
+
+
+@auth_router.post("/refresh", response_model=TokenResponse)
+async def refresh(refresh_token_request: RefreshTokenRequest, session: AsyncSession = Depends(get_session)):
+    try:
+        user_id, refresh_token = await refresh_token_store.rotate(refresh_token_request.refresh_token)
+    except RefreshTokenError as err:
+        raise HTTPException(detail=str(err), status_code=status.HTTP_401_UNAUTHORIZED)
+
+    # read past the principal cache: a deactivated user must not get new tokens from any worker
+    principal = await load_principal(session, user_id)
+    if principal is None or not principal.is_active:
+        await refresh_token_store.revoke(refresh_token)
+        raise HTTPException(detail="Inactive user", status_code=status.HTTP_403_FORBIDDEN)
+    return token_response(user_id, refresh_token)
 
 
 @auth_router.post("/logout")
-async def logout(_=Depends(get_current_user), token: str = Depends(get_token)):
-    await redis_client.setex(token, "token", TOKEN_EXPIRE_SECONDS)
+async def logout(refresh_token_request: RefreshTokenRequest):
+    await refresh_token_store.revoke(refresh_token_request.refresh_token)
@@ -0,0 +1,43 @@
+import asyncio
+
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+
+from db import ping_database
+from redis_client import redis_client
+
+health_router = APIRouter()
+
+
+async def _check(check, timeout: float) -> str:
+    try:
+        await asyncio.wait_for(check(), timeout)
+    except Exception as exc:
+        return f"unavailable: {type(exc).__name__}"
+    return "ok"
+
+
+@health_router.get("/live")
+async def live():
+    return {"status": "ok"}
+
+
+@health_router.get("/ready")
+async def ready(request: Request):
+    """Ready once startup has finished warming up and while the database and Redis answer."""
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(
+            content={"status": "starting"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    timeout = request.app.state.settings.health_check_timeout_seconds
+    database, redis = await asyncio.gather(
+        _check(ping_database, timeout), _check(redis_client.ping, timeout)
+    )
+    checks = {"database": database, "redis": redis}
+    if any(result != "ok" for result in checks.values()):
+        return JSONResponse(
+            content={"status": "unavailable", "checks": checks},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return {"status": "ok", "checks": checks}
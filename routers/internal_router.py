@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends
+
+from auth_utils import authorize, token_cache
+from db import engine, replica_engines, pool_stats, statement_cache_stats
+from principal import principal_cache
+from redis_client import redis_client
+from settings import get_settings
+
+# pool, cache and Redis internals are for operators only: every route needs read_all on "internal"
+internal_router = APIRouter(dependencies=[Depends(authorize)])
+
+
+@internal_router.get("/caches")
+async def get_cache_stats():
+    return {
+        "principal": principal_cache.stats(),
+        "tokens": token_cache.stats(),
+        "sql_statements": statement_cache_stats.stats(),
+    }
+
+
+@internal_router.get("/pool")
+async def get_pool_stats():
+    return {
+        "primary": pool_stats(engine.pool),
+        "replicas": {
+            host: pool_stats(replica_engine.pool)
+            for host, replica_engine in zip(get_settings().postgres_replica_hosts, replica_engines)
+        },
+    }
+
+
+@internal_router.get("/redis")
+async def get_redis_stats():
+    return redis_client.stats()
@@ -1,57 +1,127 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select, delete, bindparam, and_
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth_utils import get_current_user, check_access_rights
+from auth_utils import authorize
+from db import get_session, get_read_session
+from models import Product
+from principal import Principal
+from schemas.product_schemas import ProductResponse, ProductCreate, ProductPatch, product_list_adapter
+from serialization import fast_json_response
+
+
+PRODUCTS_PAGE_SIZE = 100
+PRODUCTS_MAX_PAGE_SIZE = 1000
 
 products_router = APIRouter()
 
+my_product_statement = select(Product).where(
+    and_(Product.id == bindparam("id"), Product.owner_id == bindparam("owner_id"))
+)
+delete_my_product_statement = (
+    delete(Product)
+    .where(and_(Product.id == bindparam("id"), Product.owner_id == bindparam("owner_id")))
+    .returning(Product.id)
+)
+
+
+def filter_products(
+    statement,
+    after_id: int | None,
+    min_price: int | None,
+    max_price: int | None,
+    limit: int,
+):
+    if after_id is not None:
+        statement = statement.where(Product.id > after_id)
+    if min_price is not None:
+        statement = statement.where(Product.price >= min_price)
+    if max_price is not None:
+        statement = statement.where(Product.price <= max_price)
+    return statement.order_by(Product.id).limit(limit)
+
 
-@products_router.get("", response_model=list[dict])
-def get_all_products(
-    user=Depends(get_current_user),
-    _=Depends(check_access_rights),
+async def list_products(session: AsyncSession, response: Response, statement, limit: int):
+    products = (await session.execute(statement)).scalars().all()
+    if len(products) == limit:
+        response.headers["X-Next-Cursor"] = str(products[-1].id)
+    return fast_json_response(product_list_adapter, products, response)
+
+
+@products_router.get("", response_model=list[ProductResponse])
+async def get_all_products(
+    response: Response,
+    after_id: int | None = None,
+    limit: int = Query(default=PRODUCTS_PAGE_SIZE, ge=1, le=PRODUCTS_MAX_PAGE_SIZE),
+    min_price: int | None = Query(default=None, ge=0),
+    max_price: int | None = Query(default=None, ge=0),
+    principal: Principal = Depends(authorize),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    products = [
-        {"id": 1, "name": "", "description": "", "price": 100},
-        {"id": 2, "name": "", "description": "", "price": 200},
-        {"id": 3, "name": "", "description": "", "price": 300}
-    ]
-    return products
-
-
-@products_router.get("/my", response_model=list[dict])
-def get_my_products(
-    user=Depends(get_current_user),
-    _=Depends(check_access_rights),
+    statement = filter_products(select(Product), after_id, min_price, max_price, limit)
+    return await list_products(session, response, statement, limit)
+
+
+@products_router.get("/my", response_model=list[ProductResponse])
+async def get_my_products(
+    response: Response,
+    after_id: int | None = None,
+    limit: int = Query(default=PRODUCTS_PAGE_SIZE, ge=1, le=PRODUCTS_MAX_PAGE_SIZE),
+    min_price: int | None = Query(default=None, ge=0),
+    max_price: int | None = Query(default=None, ge=0),
+    principal: Principal = Depends(authorize),
+    session: AsyncSession = Depends(get_read_session),
 ):
-    products = [
-        {"id": 1, "name": "", "description": "", "price": 100},
-    ]
-    return products
+    statement = filter_products(
+        select(Product).where(Product.owner_id == principal.id), after_id, min_price, max_price, limit
+    )
+    return await list_products(session, response, statement, limit)
 
 
-@products_router.post("/my", response_model=dict)
-def create_my_product(
-    user=Depends(get_current_user),
-    _=Depends(check_access_rights),
+@products_router.post("/my", response_model=ProductResponse)
+async def create_my_product(
+    product_create: ProductCreate,
+    session: AsyncSession = Depends(get_session),
+    principal: Principal = Depends(authorize),
 ):
-    product = {"id": 4, "name": "", "description": "", "price": 400}
+    product = Product(**product_create.model_dump(), owner_id=principal.id)
+    session.add(product)
+    await session.commit()
+    await session.refresh(product)
     return product
 
 
-@products_router.patch("/my/{id}")
-def update_my_product(
+@products_router.patch("/my/{id}", response_model=ProductResponse)
+async def update_my_product(
     id: int,
-    user = Depends(get_current_user),
-    _ = Depends(check_access_rights),
+    product_patch: ProductPatch,
+    session: AsyncSession = Depends(get_session),
+    principal: Principal = Depends(authorize),
 ):
-    product = {"id": id, "name": "", "description": "", "price": 400}
+    product = (
+        await session.execute(my_product_statement, {"id": id, "owner_id": principal.id})
+    ).scalars().one_or_none()
+    if product is None:
+        raise HTTPException(detail=f"No product with id = {id}", status_code=status.HTTP_404_NOT_FOUND)
+
+    for key, value in product_patch.model_dump(exclude_unset=True, exclude_none=True).items():
+        setattr(product, key, value)
+
+    await session.commit()
+    await session.refresh(product)
     return product
 
 
 @products_router.delete("/my/{id}")
-def delete_my_product(
+async def delete_my_product(
     id: int,
-    user=Depends(get_current_user),
-    _=Depends(check_access_rights),
+    session: AsyncSession = Depends(get_session),
+    principal: Principal = Depends(authorize),
 ):
+    deleted = (
+        await session.execute(delete_my_product_statement, {"id": id, "owner_id": principal.id})
+    ).scalars().one_or_none()
+    if deleted is None:
+        raise HTTPException(detail=f"No product with id = {id}", status_code=status.HTTP_404_NOT_FOUND)
+    await session.commit()
     return None
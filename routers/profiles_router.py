@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import get_session
-from auth_utils import get_current_user, hash_password, check_access_rights, get_token
-from .auth_router import logout
+from auth_utils import get_current_user
 from models import User
+from password_hashing import hash_password_async
+from principal import invalidate_principal
 from schemas.user_schemas import UserResponse, UserPatch
 
 profiles_router = APIRouter()
@@ -15,18 +16,18 @@ async def update_my_profile(
     user_patch: UserPatch,
     session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user),
-    _=Depends(check_access_rights),
 ):
     user_patch_data = user_patch.model_dump(exclude_unset=True, exclude_none=True)
 
     for key, value in user_patch_data.items():
         if key == "password":
-            setattr(user, "hashed_password", hash_password(value))
+            setattr(user, "hashed_password", await hash_password_async(value))
         else:
             setattr(user, key, value)
 
     await session.commit()
     await session.refresh(user)
+    await invalidate_principal(user.id)
     return user
 
 
@@ -34,11 +35,11 @@ async def update_my_profile(
 async def soft_delete_my_profile(
     session: AsyncSession = Depends(get_session),
     user: User = Depends(get_current_user),
-    token: str = Depends(get_token),
-    _=Depends(check_access_rights),
 ):
+    # every worker drops its cached principal, then authorize rejects inactive principals and /auth/refresh
+    # re-checks is_active, so no token needs revoking
     user.is_active = False
     await session.commit()
     await session.refresh(user)
-    await logout(token=token)
+    await invalidate_principal(user.id)
     return user
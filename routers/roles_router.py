@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import get_session
+from etags import conditional_get
 from models import Role
-from schemas.role_schemas import RoleResponse
+from schemas.role_schemas import RoleResponse, role_list_adapter
+from serialization import fast_json_response
 
 roles_router = APIRouter()
 
 
 @roles_router.get("", response_model=list[RoleResponse])
-async def get_all_roles(session: AsyncSession = Depends(get_session)):
+async def get_all_roles(
+    response: Response,
+    _=Depends(conditional_get("roles")),
+    session: AsyncSession = Depends(get_session),
+):
     roles = (await session.execute(select(Role))).scalars().all()
-    return roles
+    return fast_json_response(role_list_adapter, roles, response)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 from schemas.business_object import BusinessObjectResponse
 from schemas.role_schemas import RoleResponse
@@ -21,6 +21,9 @@ class AccessRuleResponse(BaseModel):
         from_attributes = True
 
 
+access_rule_list_adapter = TypeAdapter(list[AccessRuleResponse])
+
+
 class AccessRuleCreate(BaseModel):
     create_permission: bool
     read_permission: bool
@@ -48,3 +51,17 @@ class AccessRulePatch(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class AccessRuleBulkPatch(AccessRulePatch):
+    id: int
+
+
+class AccessRuleConflict(BaseModel):
+    index: int
+    detail: str
+
+
+class AccessRuleBulkResponse(BaseModel):
+    applied: list[AccessRuleResponse]
+    conflicts: list[AccessRuleConflict]
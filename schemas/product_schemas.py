@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field, TypeAdapter
+
+
+class ProductCreate(BaseModel):
+    name: str = Field(max_length=100)
+    description: str = ""
+    price: int = Field(ge=0)
+
+
+class ProductPatch(BaseModel):
+    name: str | None = Field(default=None, max_length=100)
+    description: str | None = None
+    price: int | None = Field(default=None, ge=0)
+
+
+class ProductResponse(BaseModel):
+    id: int
+    name: str
+    description: str
+    price: int
+    owner_id: int
+
+    class Config:
+        from_attributes = True
+
+
+product_list_adapter = TypeAdapter(list[ProductResponse])
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 from models import RoleType
 
@@ -9,3 +9,6 @@ class RoleResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+role_list_adapter = TypeAdapter(list[RoleResponse])
@@ -66,3 +66,9 @@ class UserLoginRequest(BaseModel):
 
 class TokenResponse(BaseModel):
     token: str
+    refresh_token: str
+    expires_in: int
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
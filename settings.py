@@ -0,0 +1,87 @@
+import os
+from functools import cache
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field, field_validator
+
+RATE_LIMIT_ENV_PREFIX = "RATE_LIMIT_"
+
+
+class Settings(BaseModel, frozen=True):
+    """Application configuration; every field is read from the environment variable of the same name in upper case."""
+
+    postgres_host: str | None = None
+    postgres_port: int = 5432
+    postgres_db: str | None = None
+    postgres_user: str | None = None
+    postgres_password: str | None = None
+    # full SQLAlchemy URL overriding the POSTGRES_* settings, e.g. sqlite+aiosqlite:///bench.db for local benchmarks
+    database_url: str | None = None
+    postgres_pool_size: int = 5
+    postgres_max_overflow: int = 10
+    postgres_pool_recycle: int = 1800
+    postgres_pool_pre_ping: bool = True
+    postgres_pool_timeout: float = 5
+    postgres_query_cache_size: int = 500
+    postgres_statement_cache_size: int = 500
+    postgres_connect_timeout: float = 10
+    # comma separated host:port list of read replicas sharing the primary's database and credentials
+    postgres_replica_hosts: list[str] = []
+    postgres_replica_retry_seconds: float = 30
+
+    redis_host: str
+    redis_port: int
+    redis_db: int
+    redis_max_connections: int = 50
+    redis_pool_timeout: float = 5
+    redis_coalesce_window_seconds: float = 0
+    redis_warm_connections: int = 5
+
+    secret_key: str
+    algorithm: str
+    token_expire_seconds: int
+    token_cache_size: int = 10000
+    refresh_token_expire_seconds: int = 30 * 24 * 3600
+
+    principal_cache_size: int = 10_000
+    principal_cache_ttl_seconds: float = 30
+
+    bcrypt_rounds: int = 12
+    hashing_workers: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    hashing_queue_size: int = 64
+    hashing_timeout_seconds: float = 5
+
+    # RATE_LIMIT_<ROUTE>_<KEY> overrides, keyed by "<route>_<key>" in lower case
+    rate_limits: dict[str, str] = {}
+
+    health_check_timeout_seconds: float = 1
+
+    @field_validator("postgres_replica_hosts", mode="before")
+    @classmethod
+    def split_hosts(cls, value):
+        if isinstance(value, str):
+            return [host.strip() for host in value.split(",") if host.strip()]
+        return value
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        values = {name: os.environ[name.upper()] for name in cls.model_fields if name.upper() in os.environ}
+        values["rate_limits"] = {
+            name.removeprefix(RATE_LIMIT_ENV_PREFIX).lower(): value
+            for name, value in os.environ.items() if name.startswith(RATE_LIMIT_ENV_PREFIX)
+        }
+        return cls(**values)
+
+    @property
+    def primary_database_url(self) -> str:
+        return self.database_url or self.make_database_url(self.postgres_host, self.postgres_port)
+
+    def make_database_url(self, host: str, port: str | int) -> str:
+        return f"postgresql+asyncpg://{self.postgres_user}:{self.postgres_password}@{host}:{port}/{self.postgres_db}"
+
+
+@cache
+def get_settings() -> Settings:
+    """Read .env and the environment once per process."""
+    load_dotenv()
+    return Settings.from_env()
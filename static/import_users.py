@@ -0,0 +1,222 @@
+"""Bulk import of users from a CSV or JSONL file with the columns of /auth/sign-up.
+
+    python -m static.import_users users.csv
+    python -m static.import_users users.jsonl --batch-size 2000 --workers 8 --errors errors.jsonl
+
+Rows are validated like sign-up, passwords are hashed in a process pool and every batch is copied with COPY into
+a temporary table, then inserted with ON CONFLICT (email) DO NOTHING in its own transaction. Only two batches are
+held in memory at a time: the one being hashed and the one being loaded.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import Column, Integer, MetaData, String, Table, select, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
+
+from catalogue import get_role_catalogue, reload_role_catalogue
+from db import AsyncSessionLocal
+from models import User, RoleType
+from password_hashing import hash_password
+from schemas.user_schemas import UserRequest
+
+USER_COLUMNS = ("firstname", "surname", "middle_name", "email", "hashed_password", "role_id")
+# csv.DictReader key for the values of a row that has more fields than the header
+EXTRA_FIELDS_KEY = "__extra_fields__"
+
+staging_table = Table(
+    "import_users_staging",
+    MetaData(),
+    Column("line", Integer),
+    *(Column(name, Integer if name == "role_id" else String) for name in USER_COLUMNS),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DELETE ROWS",
+)
+insert_users_statement = (
+    insert(User)
+    .from_select(
+        [*USER_COLUMNS, "is_active"],
+        select(*(staging_table.c[name] for name in USER_COLUMNS), true()).order_by(staging_table.c.line),
+    )
+    .on_conflict_do_nothing(index_elements=[User.email])
+    .returning(User.email)
+)
+
+
+class ImportStats:
+    def __init__(self, errors_file):
+        self.errors_file = errors_file
+        self.read = 0
+        self.imported = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def error(self, line: int, email: str | None, message: str):
+        self.failed += 1
+        error = {"line": line, "email": email, "error": message}
+        self.errors_file.write(json.dumps(error, ensure_ascii=False) + "\n")
+
+    def progress(self):
+        elapsed = time.perf_counter() - self.started
+        print(
+            f"read {self.read}, imported {self.imported}, failed {self.failed}, "
+            f"{self.read / elapsed if elapsed else 0:.0f} rows/s",
+            file=sys.stderr,
+        )
+
+
+def read_rows(file, file_format: str):
+    """Yield (line number, row dict or parse error message) without reading the whole file."""
+    if file_format == "csv":
+        reader = csv.DictReader(file, restkey=EXTRA_FIELDS_KEY)
+        for row in reader:
+            if EXTRA_FIELDS_KEY in row:
+                expected = len(reader.fieldnames)
+                yield reader.line_num, f"Expected {expected} fields, got {expected + len(row[EXTRA_FIELDS_KEY])}"
+                continue
+            yield reader.line_num, {key: value if value != "" else None for key, value in row.items()}
+    else:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as err:
+                yield line_number, f"Invalid JSON: {err}"
+                continue
+            yield line_number, row if isinstance(row, dict) else "Expected a JSON object"
+
+
+def validate_row(row: dict) -> UserRequest:
+    try:
+        user_request = UserRequest(**row)
+    except HTTPException as err:
+        raise ValueError(err.detail)
+    except ValidationError as err:
+        raise ValueError("; ".join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in err.errors()
+        ))
+    except TypeError as err:
+        raise ValueError(str(err))
+
+    role = get_role_catalogue().get(user_request.role_id)
+    if role is None:
+        raise ValueError(f"No role with id = {user_request.role_id}")
+    if role == RoleType.ADMIN:
+        raise ValueError("You cannot choose ADMIN role")
+    for name in ("firstname", "surname", "middle_name", "email"):
+        value, length = getattr(user_request, name), User.__table__.c[name].type.length
+        if value is not None and len(value) > length:
+            raise ValueError(f"{name}: must be at most {length} characters")
+    return user_request
+
+
+def read_batches(file, file_format: str, batch_size: int, stats: ImportStats):
+    """Yield lists of (line number, valid user) with distinct emails, reporting invalid rows as they are read."""
+    batch = {}
+    for line_number, row in read_rows(file, file_format):
+        stats.read += 1
+        if isinstance(row, str):
+            stats.error(line_number, None, row)
+            continue
+        try:
+            user_request = validate_row(row)
+        except ValueError as err:
+            stats.error(line_number, row.get("email"), str(err))
+            continue
+        if user_request.email in batch:
+            stats.error(line_number, user_request.email, f"Duplicate of line {batch[user_request.email][0]}")
+            continue
+        batch[user_request.email] = line_number, user_request
+        if len(batch) >= batch_size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+async def hash_batch(pool: ProcessPoolExecutor, workers: int, batch: list) -> list[tuple]:
+    passwords = [user_request.password for _, user_request in batch]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    hashes = await asyncio.get_running_loop().run_in_executor(
+        None, lambda: list(pool.map(hash_password, passwords, chunksize=chunksize))
+    )
+    return [
+        (
+            line_number, user_request.firstname, user_request.surname, user_request.middle_name,
+            user_request.email, hashed_password, user_request.role_id,
+        )
+        for (line_number, user_request), hashed_password in zip(batch, hashes)
+    ]
+
+
+async def load_batch(session: AsyncSession, records: list[tuple]) -> set[str]:
+    """COPY a batch into the staging table and insert it into users in one transaction; return inserted emails."""
+    connection = await session.connection()
+    await connection.execute(CreateTable(staging_table, if_not_exists=True))
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        staging_table.name, records=records, columns=[column.name for column in staging_table.columns]
+    )
+    inserted = set((await session.execute(insert_users_statement)).scalars())
+    await session.commit()
+    return inserted
+
+
+async def load_and_report(records: list[tuple], stats: ImportStats):
+    async with AsyncSessionLocal() as session:
+        inserted = await load_batch(session, records)
+    stats.imported += len(inserted)
+    for line_number, _, _, _, email, _, _ in records:
+        if email not in inserted:
+            stats.error(line_number, email, "User with such login already exists")
+    stats.progress()
+
+
+async def import_users(file, file_format: str, batch_size: int, workers: int, stats: ImportStats):
+    async with AsyncSessionLocal() as session:
+        await reload_role_catalogue(session)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        loading = None
+        for batch in read_batches(file, file_format, batch_size, stats):
+            records = await hash_batch(pool, workers, batch)
+            # the previous batch is copied while this one was being hashed
+            if loading is not None:
+                await loading
+            loading = asyncio.create_task(load_and_report(records, stats))
+        if loading is not None:
+            await loading
+        else:
+            stats.progress()
+
+
+async def main(args):
+    file_format = args.format or ("csv" if args.path.endswith(".csv") else "jsonl")
+    errors_file = open(args.errors, "w", encoding="utf-8") if args.errors else sys.stderr
+    try:
+        with open(args.path, newline="", encoding="utf-8") as file:
+            await import_users(file, file_format, args.batch_size, args.workers, ImportStats(errors_file))
+    finally:
+        if errors_file is not sys.stderr:
+            errors_file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import users from CSV or JSONL")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="default: by file extension")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="password hashing processes")
+    parser.add_argument("--errors", help="write per-row errors as JSONL to this file instead of stderr")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,144 @@
+"""Bring roles, business objects and access rules in the database in line with a declarative policy file.
+
+    python -m static.sync_policy static/policy.json
+    python -m static.sync_policy policy.json --prune --dry-run
+
+Current state is read with one query per table, the difference is applied with set-based inserts and
+upserts in a single transaction. Roles and business objects are only ever added; access rules missing from
+the policy are deleted only with --prune.
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from pydantic import BaseModel, model_validator
+from sqlalchemy import delete, select, bindparam
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from access_matrix import permission_columns
+from db import AsyncSessionLocal, engine
+from models import AccessRule, BusinessObject, Role, RoleType
+from policy_listener import publish_policy_change
+
+DEFAULT_POLICY_PATH = Path(__file__).with_name("policy.json")
+# permission name used in the policy file -> AccessRule column key
+PERMISSION_KEYS = {permission.name.lower(): column.key for permission, column in permission_columns.items()}
+
+access_rules_state_statement = select(
+    AccessRule.id, AccessRule.role_id, AccessRule.business_object_id, *permission_columns.values()
+)
+delete_access_rules_statement = delete(AccessRule).where(AccessRule.id.in_(bindparam("ids", expanding=True)))
+upsert_access_rules_statement = insert(AccessRule)
+upsert_access_rules_statement = upsert_access_rules_statement.on_conflict_do_update(
+    index_elements=[AccessRule.role_id, AccessRule.business_object_id],
+    set_={key: upsert_access_rules_statement.excluded[key] for key in PERMISSION_KEYS.values()},
+)
+
+
+class Policy(BaseModel):
+    roles: list[RoleType]
+    business_objects: list[str]
+    # role -> business object -> granted permission names
+    access_rules: dict[RoleType, dict[str, list[str]]]
+
+    @model_validator(mode="after")
+    def check_references(self):
+        business_objects = set(self.business_objects)
+        for role, rules in self.access_rules.items():
+            if role not in self.roles:
+                raise ValueError(f"Access rules reference undeclared role {role.value}")
+            for business_object, permissions in rules.items():
+                if business_object not in business_objects:
+                    raise ValueError(f"Access rules reference undeclared business object {business_object}")
+                unknown = set(permissions) - PERMISSION_KEYS.keys()
+                if unknown:
+                    raise ValueError(f"Unknown permissions {sorted(unknown)} for {role.value}/{business_object}")
+        return self
+
+
+def load_policy(path: str | Path) -> Policy:
+    return Policy.model_validate(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+async def sync_policy(session: AsyncSession, policy: Policy, prune: bool = False) -> dict[str, int]:
+    """Apply the policy within the session's transaction and return the number of changed rows per kind."""
+    # plain Core execution on the session's connection, ORM row processing is measurable at 10k rules
+    connection = await session.connection()
+    roles = dict((await connection.execute(select(Role.name, Role.id))).all())
+    new_roles = [role for role in dict.fromkeys(policy.roles) if role not in roles]
+    if new_roles:
+        roles.update((await connection.execute(
+            insert(Role).values([{"name": role} for role in new_roles]).returning(Role.name, Role.id)
+        )).all())
+
+    business_objects = dict((await connection.execute(select(BusinessObject.name, BusinessObject.id))).all())
+    new_business_objects = [name for name in dict.fromkeys(policy.business_objects) if name not in business_objects]
+    if new_business_objects:
+        business_objects.update((await connection.execute(
+            insert(BusinessObject)
+            .values([{"name": name} for name in new_business_objects])
+            .returning(BusinessObject.name, BusinessObject.id)
+        )).all())
+
+    current = {
+        (role_id, business_object_id): (access_rule_id, tuple(flags))
+        for access_rule_id, role_id, business_object_id, *flags
+        in await connection.execute(access_rules_state_statement)
+    }
+    desired = {}
+    for role, rules in policy.access_rules.items():
+        for business_object, permissions in rules.items():
+            granted = set(permissions)
+            desired[(roles[role], business_objects[business_object])] = tuple(
+                name in granted for name in PERMISSION_KEYS
+            )
+    upserts = [
+        {"role_id": role_id, "business_object_id": business_object_id, **dict(zip(PERMISSION_KEYS.values(), flags))}
+        for (role_id, business_object_id), flags in desired.items()
+        if current.get((role_id, business_object_id), (None, None))[1] != flags
+    ]
+    stale_ids = [access_rule_id for key, (access_rule_id, _) in current.items() if key not in desired] if prune else []
+
+    if upserts:
+        await connection.execute(upsert_access_rules_statement, upserts)
+    if stale_ids:
+        await connection.execute(delete_access_rules_statement, {"ids": stale_ids})
+
+    created = sum(1 for row in upserts if (row["role_id"], row["business_object_id"]) not in current)
+    return {
+        "roles_created": len(new_roles),
+        "business_objects_created": len(new_business_objects),
+        "access_rules_created": created,
+        "access_rules_updated": len(upserts) - created,
+        "access_rules_deleted": len(stale_ids),
+    }
+
+
+async def main(args):
+    policy = load_policy(args.path)
+    started = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as session:
+            changes = await sync_policy(session, policy, prune=args.prune)
+            if args.dry_run:
+                await session.rollback()
+            else:
+                await session.commit()
+    finally:
+        await engine.dispose()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(", ".join(f"{kind} {count}" for kind, count in changes.items()) + f" ({elapsed_ms:.1f} ms)")
+    if any(changes.values()) and not args.dry_run:
+        # every running worker reloads the matrix, the catalogues and the ETag versions
+        await publish_policy_change()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync roles, business objects and access rules with a policy file")
+    parser.add_argument("path", nargs="?", default=DEFAULT_POLICY_PATH)
+    parser.add_argument("--prune", action="store_true", help="delete access rules that are not in the policy")
+    parser.add_argument("--dry-run", action="store_true", help="report the changes without committing them")
+    asyncio.run(main(parser.parse_args()))
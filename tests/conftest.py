@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+
+# the application reads its settings once at import time, so the environment is prepared first
+_directory = tempfile.mkdtemp(prefix="app-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{_directory}/test.db",
+    "REDIS_HOST": "localhost", "REDIS_PORT": "6379", "REDIS_DB": "0",
+    "SECRET_KEY": "test-secret-key-that-is-long-enough-for-hs256", "ALGORITHM": "HS256",
+    "TOKEN_EXPIRE_SECONDS": "300",
+    "BCRYPT_ROUNDS": "4",
+})
+
+import httpx
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+import db
+from auth_utils import token_cache
+from main import app as application
+from models import Base
+from principal import principal_cache
+from redis_client import redis_client
+from static.fill_db_data import fill_db_data
+
+ADMIN_EMAIL = "oleg@mail.com"
+PASSWORD = "aBc123-+"
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_directory, ignore_errors=True)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def app():
+    """The application on a freshly seeded database and an empty Redis, with its lifespan running."""
+    redis_client.redis = FakeAsyncRedis(server=FakeServer())
+    async with db.engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    async with db.AsyncSessionLocal() as session:
+        await fill_db_data(session)
+        await session.commit()
+    principal_cache.clear()
+    token_cache.clear()
+    async with application.router.lifespan_context(application):
+        yield application
+
+
+@pytest.fixture
+async def client(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def login(client: httpx.AsyncClient, email: str = ADMIN_EMAIL, password: str = PASSWORD) -> dict:
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def sign_up(client: httpx.AsyncClient, email: str, role_id: int) -> dict:
+    response = await client.post("/auth/sign-up", json={
+        "firstname": "Ivan", "surname": "Ivanov", "email": email, "password": PASSWORD, "role_id": role_id,
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['token']}"}
@@ -0,0 +1,224 @@
+import pytest
+from sqlalchemy import delete, select
+
+import db
+from access_matrix import Permission, get_access_matrix
+from auth_utils import get_route_auth
+from conftest import bearer, login, sign_up
+from models import AccessRule, BusinessObject, Role, RoleType
+from policy_listener import POLICY_CHANNEL, PolicyListener, reload_policy
+from redis_client import redis_client
+
+pytestmark = pytest.mark.anyio
+
+
+async def role_id(name: RoleType) -> int:
+    async with db.AsyncSessionLocal() as session:
+        return (await session.execute(select(Role.id).where(Role.name == name))).scalar_one()
+
+
+async def business_object_id(name: str) -> int:
+    async with db.AsyncSessionLocal() as session:
+        return (await session.execute(select(BusinessObject.id).where(BusinessObject.name == name))).scalar_one()
+
+
+async def access_rule_id(role: RoleType, business_object: str) -> int:
+    async with db.AsyncSessionLocal() as session:
+        return (await session.execute(
+            select(AccessRule.id).where(
+                AccessRule.role_id == await role_id(role),
+                AccessRule.business_object_id == await business_object_id(business_object),
+            )
+        )).scalar_one()
+
+
+async def test_matrix_is_compiled_from_the_access_rules(app):
+    matrix = get_access_matrix()
+    user, admin = await role_id(RoleType.USER), await role_id(RoleType.ADMIN)
+
+    assert matrix.mask(user, "products") == Permission.CREATE | Permission.READ | Permission.UPDATE | Permission.DELETE
+    assert matrix.mask(user, "access_rules") == Permission.READ
+    assert matrix.mask(admin, "access_rules") == sum(Permission)
+    assert matrix.mask(user, "orders") == 0
+
+
+async def test_route_table_maps_methods_to_permissions(app):
+    own = get_route_auth("/products/my", "GET")
+    assert (own.tag, own.own_scope) == ("products", True)
+    assert (own.own_permission, own.all_permission) == (Permission.READ, Permission.READ_ALL)
+
+    listing = get_route_auth("/products", "GET")
+    assert (listing.tag, listing.own_scope) == ("products", False)
+
+    update = get_route_auth("/access-rules/{id}", "PATCH")
+    assert (update.own_permission, update.all_permission) == (Permission.UPDATE, Permission.UPDATE_ALL)
+
+
+async def test_own_scope_permission_only_opens_my_routes(client):
+    user = await sign_up(client, "user@mail.com", role_id=await role_id(RoleType.USER))
+
+    assert (await client.get("/products/my", headers=bearer(user))).status_code == 200
+    assert (await client.get("/products", headers=bearer(user))).status_code == 403
+
+
+async def test_all_scope_permission_opens_every_route(client):
+    superuser = await sign_up(client, "superuser@mail.com", role_id=await role_id(RoleType.SUPERUSER))
+
+    assert (await client.get("/products", headers=bearer(superuser))).status_code == 200
+    assert (await client.get("/products/my", headers=bearer(superuser))).status_code == 200
+
+
+async def test_permission_for_another_method_is_not_enough(client):
+    user = await sign_up(client, "user@mail.com", role_id=await role_id(RoleType.USER))
+
+    assert (await client.get("/access-rules/my", headers=bearer(user))).status_code == 200
+    assert (await client.patch(
+        f"/access-rules/{await access_rule_id(RoleType.USER, 'products')}",
+        headers=bearer(user), json={"read_all_permission": True},
+    )).status_code == 403
+
+
+async def test_missing_rule_is_forbidden(client):
+    user = await sign_up(client, "user@mail.com", role_id=await role_id(RoleType.USER))
+    async with db.AsyncSessionLocal() as session:
+        await session.execute(delete(AccessRule).where(AccessRule.id == await access_rule_id(RoleType.USER, "products")))
+        await session.commit()
+    await reload_policy()
+
+    assert (await client.get("/products/my", headers=bearer(user))).status_code == 403
+
+
+async def test_missing_token_is_rejected(client):
+    assert (await client.get("/products/my")).status_code == 403
+    assert (await client.get("/products/my", headers={"Authorization": "Bearer garbage"})).status_code == 401
+
+
+async def test_matrix_is_reloaded_after_update(client):
+    user = await sign_up(client, "user@mail.com", role_id=await role_id(RoleType.USER))
+    admin = await login(client)
+
+    response = await client.patch(
+        f"/access-rules/{await access_rule_id(RoleType.USER, 'products')}",
+        headers=bearer(admin), json={"read_all_permission": True},
+    )
+
+    assert response.status_code == 200
+    assert (await client.get("/products", headers=bearer(user))).status_code == 200
+
+
+async def test_matrix_is_reloaded_after_create(client):
+    user = await sign_up(client, "user@mail.com", role_id=await role_id(RoleType.USER))
+    admin = await login(client)
+    async with db.AsyncSessionLocal() as session:
+        await session.execute(delete(AccessRule).where(AccessRule.id == await access_rule_id(RoleType.USER, "products")))
+        await session.commit()
+    await reload_policy()
+    assert (await client.get("/products/my", headers=bearer(user))).status_code == 403
+
+    response = await client.post("/access-rules", headers=bearer(admin), json={
+        "create_permission": False, "read_permission": True, "read_all_permission": False,
+        "update_permission": False, "update_all_permission": False,
+        "delete_permission": False, "delete_all_permission": False,
+        "role_id": await role_id(RoleType.USER), "business_object_id": await business_object_id("products"),
+    })
+
+    assert response.status_code == 200
+    assert (await client.get("/products/my", headers=bearer(user))).status_code == 200
+    assert (await client.post("/products/my", headers=bearer(user), json={"name": "x", "price": 1})).status_code == 403
+
+
+async def test_listener_is_subscribed_when_started(app):
+    listener = PolicyListener()
+    await listener.start()
+    try:
+        # the app's own listener is subscribed as well
+        assert await redis_client.redis.pubsub_numsub(POLICY_CHANNEL) == [(POLICY_CHANNEL.encode(), 2)]
+    finally:
+        await listener.stop()
+
+
+async def test_bulk_create_checks_ids_against_the_catalogues(client):
+    admin = await login(client)
+    async with db.AsyncSessionLocal() as session:
+        await session.execute(delete(AccessRule).where(AccessRule.id == await access_rule_id(RoleType.USER, "products")))
+        await session.commit()
+    rule = {
+        "create_permission": False, "read_permission": True, "read_all_permission": False,
+        "update_permission": False, "update_all_permission": False,
+        "delete_permission": False, "delete_all_permission": False,
+        "role_id": await role_id(RoleType.USER), "business_object_id": await business_object_id("products"),
+    }
+
+    response = await client.post("/access-rules/bulk", headers=bearer(admin), json=[
+        rule, {**rule, "role_id": 999}, {**rule, "business_object_id": 999},
+    ])
+
+    assert response.status_code == 200
+    assert [(created["role"]["name"], created["business_object"]["name"]) for created in response.json()["applied"]] == [
+        (RoleType.USER.value, "products")
+    ]
+    assert response.json()["conflicts"] == [
+        {"index": 1, "detail": "No role with id = 999"},
+        {"index": 2, "detail": "No business object with id = 999"},
+    ]
+
+
+async def test_internal_routes_are_for_admins_only(client):
+    superuser = await sign_up(client, "superuser@mail.com", role_id=await role_id(RoleType.SUPERUSER))
+    admin = await login(client)
+
+    for path in ("/internal/pool", "/internal/caches", "/internal/redis"):
+        assert (await client.get(path)).status_code == 403
+        assert (await client.get(path, headers=bearer(superuser))).status_code == 403
+        assert (await client.get(path, headers=bearer(admin))).status_code == 200
+
+
+async def test_my_access_rules_include_role_and_business_object(client):
+    admin = await login(client)
+
+    response = await client.get("/access-rules/my", headers=bearer(admin))
+
+    assert response.status_code == 200
+    assert {rule["business_object"]["name"] for rule in response.json()} == {
+        "access_rules", "profiles", "products", "internal",
+    }
+    assert {rule["role"]["name"] for rule in response.json()} == {"Admin"}
+
+
+class UnavailableRedis:
+    def __getattr__(self, name):
+        raise ConnectionError("Redis is down")
+
+
+async def test_access_rule_write_succeeds_while_redis_is_down(client, monkeypatch):
+    user = await sign_up(client, "user@mail.com", role_id=await role_id(RoleType.USER))
+    admin = await login(client)
+    monkeypatch.setattr(redis_client, "redis", UnavailableRedis())
+
+    response = await client.patch(
+        f"/access-rules/{await access_rule_id(RoleType.USER, 'products')}",
+        headers=bearer(admin), json={"read_all_permission": True},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["read_all_permission"] is True
+    assert (await client.get("/products", headers=bearer(user))).status_code == 200
+
+
+async def test_rejected_requests_do_not_open_a_read_session(client, monkeypatch):
+    opened = []
+    open_read_session = db._open_read_session
+
+    async def recording_open_read_session():
+        opened.append(True)
+        return await open_read_session()
+
+    monkeypatch.setattr(db, "_open_read_session", recording_open_read_session)
+    user = await sign_up(client, "user@mail.com", role_id=await role_id(RoleType.USER))
+
+    assert (await client.get("/products")).status_code == 403
+    assert (await client.get("/products", headers=bearer(user))).status_code == 403
+    assert (await client.get("/products/my", headers={"Authorization": "Bearer garbage"})).status_code == 401
+    assert opened == []
+    assert (await client.get("/products/my", headers=bearer(user))).status_code == 200
+    assert opened == [True]
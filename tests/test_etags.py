@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import delete, select
+
+import db
+from conftest import bearer, login
+from models import AccessRule, Role, RoleType
+from policy_listener import reload_policy
+from redis_client import redis_client
+
+pytestmark = pytest.mark.anyio
+
+
+class UnavailableRedis:
+    def __getattr__(self, name):
+        raise ConnectionError("Redis is down")
+
+
+async def test_unchanged_resource_is_not_modified(client):
+    etag = (await client.get("/roles")).headers["ETag"]
+
+    assert (await client.get("/roles", headers={"If-None-Match": etag})).status_code == 304
+
+
+async def test_conditional_get_needs_no_redis(client, monkeypatch):
+    etag = (await client.get("/roles")).headers["ETag"]
+    monkeypatch.setattr(redis_client, "redis", UnavailableRedis())
+
+    assert (await client.get("/roles", headers={"If-None-Match": etag})).status_code == 304
+    assert (await client.get("/roles")).status_code == 200
+
+
+async def test_etag_changes_after_an_access_rule_change(client):
+    admin = await login(client)
+    etag = (await client.get("/access-rules/my", headers=bearer(admin))).headers["ETag"]
+    async with db.AsyncSessionLocal() as session:
+        access_rule_id = (await session.execute(select(AccessRule.id).limit(1))).scalar_one()
+
+    await client.patch(f"/access-rules/{access_rule_id}", headers=bearer(admin), json={"delete_permission": True})
+
+    response = await client.get("/access-rules/my", headers={**bearer(admin), "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+async def test_etag_depends_on_the_query(client):
+    admin = await login(client)
+    first = (await client.get("/access-rules", headers=bearer(admin), params={"limit": 1})).headers["ETag"]
+    second = (await client.get("/access-rules", headers=bearer(admin), params={"limit": 2})).headers["ETag"]
+
+    assert first != second
+
+
+async def test_roles_etag_changes_after_the_roles_change(client):
+    etag = (await client.get("/roles")).headers["ETag"]
+    async with db.AsyncSessionLocal() as session:
+        await session.execute(delete(Role).where(Role.name == RoleType.SUPERUSER))
+        await session.commit()
+    await reload_policy()
+
+    assert (await client.get("/roles", headers={"If-None-Match": etag})).status_code == 200
@@ -0,0 +1,55 @@
+import io
+import json
+
+import pytest
+
+from static.import_users import ImportStats, read_batches
+
+pytestmark = pytest.mark.anyio
+
+PASSWORD = "aBc123-+"
+
+
+def import_rows(content: str, file_format: str) -> tuple[list[str], dict[int, str]]:
+    errors = io.StringIO()
+    batches = list(read_batches(io.StringIO(content, newline=""), file_format, 100, ImportStats(errors)))
+    emails = [user_request.email for batch in batches for _, user_request in batch]
+    return emails, {error["line"]: error["error"] for error in map(json.loads, errors.getvalue().splitlines())}
+
+
+async def test_malformed_csv_rows_are_reported_per_row(app):
+    content = (
+        "firstname,surname,middle_name,email,password,role_id\n"
+        f"Ivan,Ivanov,,ivan@mail.com,{PASSWORD},1\n"
+        f"Petr,Petrov,,petr@mail.com,{PASSWORD},1,extra,fields\n"
+        "Anna,Ivanova\n"
+        f"Olga,Petrova,,olga@mail.com,{PASSWORD},not-a-number\n"
+        f"Oleg,Olegov,,oleg2@mail.com,{PASSWORD},2\n"
+    )
+
+    emails, errors = import_rows(content, "csv")
+
+    assert emails == ["ivan@mail.com", "oleg2@mail.com"]
+    assert errors[3] == "Expected 6 fields, got 8"
+    assert set(errors) == {3, 4, 5}
+
+
+async def test_malformed_jsonl_rows_are_reported_per_row(app):
+    valid = {"firstname": "Ivan", "surname": "Ivanov", "email": "ivan@mail.com", "password": PASSWORD, "role_id": 1}
+    content = "\n".join([
+        json.dumps(valid),
+        "{not json",
+        json.dumps([valid]),
+        json.dumps({**valid, "email": "petr@mail.com", "role_id": {"id": 1}}),
+        json.dumps({**valid, "email": "olga@mail.com", "password": "short"}),
+        json.dumps({**valid, "email": "anna@mail.com", "role_id": 3}),
+        json.dumps({**valid, "email": "oleg2@mail.com"}),
+    ]) + "\n"
+
+    emails, errors = import_rows(content, "jsonl")
+
+    assert emails == ["ivan@mail.com", "oleg2@mail.com"]
+    assert errors[2].startswith("Invalid JSON")
+    assert errors[3] == "Expected a JSON object"
+    assert errors[6] == "You cannot choose ADMIN role"
+    assert set(errors) == {2, 3, 4, 5, 6}
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from redis_client import redis_client
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_gets_share_one_mget(app, monkeypatch):
+    await redis_client.setex("a", "1", 60)
+    calls = []
+    mget = redis_client.redis.mget
+
+    async def recording_mget(keys):
+        calls.append(list(keys))
+        return await mget(keys)
+
+    monkeypatch.setattr(redis_client.redis, "mget", recording_mget)
+
+    values = await asyncio.gather(*(redis_client.get(key) for key in ("a", "b", "a")))
+
+    assert values == [b"1", None, b"1"]
+    assert calls == [["a", "b"]]
+
+
+async def test_get_after_a_write_does_not_join_an_earlier_mget(app, monkeypatch):
+    await redis_client.setex("key", "old", 60)
+    sent, release = asyncio.Event(), asyncio.Event()
+    mget = redis_client.redis.mget
+
+    async def slow_mget(keys):
+        values = await mget(keys)
+        sent.set()
+        await release.wait()
+        return values
+
+    monkeypatch.setattr(redis_client.redis, "mget", slow_mget)
+    earlier = asyncio.create_task(redis_client.get("key"))
+    await sent.wait()
+
+    await redis_client.setex("key", "new", 60)
+    later = asyncio.create_task(redis_client.get("key"))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await earlier == b"old"
+    assert await later == b"new"
@@ -0,0 +1,99 @@
+import pytest
+
+from conftest import bearer, login, sign_up
+from redis_client import redis_client
+from refresh_tokens import (
+    REFRESH_FAMILY_KEY_PREFIX,
+    REFRESH_TOKEN_KEY_PREFIX,
+    _digest,
+    refresh_token_store,
+)
+from settings import get_settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def refresh(client, refresh_token: str):
+    return await client.post("/auth/refresh", json={"refresh_token": refresh_token})
+
+
+async def test_issue_writes_the_token_and_its_family_with_the_same_ttl(app):
+    token = await refresh_token_store.issue(42)
+
+    record = await redis_client.redis.get(REFRESH_TOKEN_KEY_PREFIX + _digest(token))
+    family, user_id = record.decode().split(":")
+    assert user_id == "42"
+    assert await redis_client.redis.get(REFRESH_FAMILY_KEY_PREFIX + family) == _digest(token).encode()
+    ttl = get_settings().refresh_token_expire_seconds
+    assert ttl - 5 <= await redis_client.redis.ttl(REFRESH_TOKEN_KEY_PREFIX + _digest(token)) <= ttl
+    assert ttl - 5 <= await redis_client.redis.ttl(REFRESH_FAMILY_KEY_PREFIX + family) <= ttl
+
+
+async def test_refresh_rotates_the_token(client):
+    tokens = await login(client)
+
+    response = await refresh(client, tokens["refresh_token"])
+
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert (await client.get("/access-rules", headers=bearer(rotated))).status_code == 200
+    assert (await refresh(client, rotated["refresh_token"])).status_code == 200
+
+
+async def test_reusing_a_rotated_token_revokes_the_family(client):
+    tokens = await login(client)
+    rotated = (await refresh(client, tokens["refresh_token"])).json()
+
+    assert (await refresh(client, tokens["refresh_token"])).status_code == 401
+    # the legitimate holder of the latest token is logged out as well
+    assert (await refresh(client, rotated["refresh_token"])).status_code == 401
+
+
+async def test_reuse_does_not_touch_other_sessions(client):
+    first = await login(client)
+    second = await login(client)
+    await refresh(client, first["refresh_token"])
+
+    await refresh(client, first["refresh_token"])
+
+    assert (await refresh(client, second["refresh_token"])).status_code == 200
+
+
+async def test_unknown_refresh_token_is_rejected(client):
+    assert (await refresh(client, "not-a-token")).status_code == 401
+
+
+async def test_logout_revokes_the_family(client):
+    tokens = await login(client)
+    rotated = (await refresh(client, tokens["refresh_token"])).json()
+
+    response = await client.post("/auth/logout", json={"refresh_token": rotated["refresh_token"]})
+
+    assert response.status_code == 200
+    assert (await refresh(client, rotated["refresh_token"])).status_code == 401
+
+
+async def test_logout_with_an_unknown_token_is_ignored(client):
+    assert (await client.post("/auth/logout", json={"refresh_token": "not-a-token"})).status_code == 200
+
+
+async def test_inactive_user_cannot_refresh(client):
+    tokens = await sign_up(client, "ivan@mail.com", role_id=1)
+    assert (await client.delete("/profile/my", headers=bearer(tokens))).status_code == 200
+
+    response = await refresh(client, tokens["refresh_token"])
+
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Inactive user"
+    # the rotated family is revoked rather than left usable
+    assert (await refresh(client, tokens["refresh_token"])).status_code == 401
+    assert (await client.get("/access-rules/my", headers=bearer(tokens))).status_code == 403
+
+
+async def test_refresh_token_is_not_an_access_token(client):
+    tokens = await login(client)
+
+    response = await client.get("/access-rules", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+
+    assert response.status_code == 401
@@ -0,0 +1,20 @@
+import pytest
+
+from request_metrics import request_metrics
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_client_controlled_labels_stay_bounded(client):
+    request_metrics.duration.clear()
+
+    for index in range(20):
+        await client.request(f"METHOD{index}", "/roles")
+        await client.get(f"/no-such-path/{index}")
+    await client.get("/roles")
+
+    assert set(request_metrics.duration) == {
+        ("other", "/roles", ""),
+        ("GET", "unmatched", ""),
+        ("GET", "/roles", ""),
+    }
@@ -0,0 +1,7 @@
+from uvicorn_worker import UvicornWorker
+
+
+class AppWorker(UvicornWorker):
+    """Uvicorn worker for gunicorn on uvloop and httptools; a failing lifespan startup stops the worker."""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "lifespan": "on"}